@@ -0,0 +1,59 @@
+"""documents ledger
+
+Revision ID: 7c41d2a9b3e5
+Revises: 30fa3a1d54e2
+Create Date: 2026-10-18 10:12:03.417256
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c41d2a9b3e5"
+down_revision: Union[str, Sequence[str], None] = "30fa3a1d54e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "documents",
+        sa.Column("blob_name", sa.String(length=1024), nullable=False),
+        sa.Column("generation", sa.BigInteger(), nullable=False),
+        sa.Column("blob_updated", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("state", sa.String(length=16), nullable=False),
+        sa.Column("source_uri", sa.String(length=1024), nullable=False),
+        sa.Column("output_prefix", sa.String(length=1024), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("blob_name"),
+    )
+    op.create_index(
+        op.f("ix_documents_blob_updated"), "documents", ["blob_updated"], unique=False
+    )
+    op.create_index(op.f("ix_documents_state"), "documents", ["state"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_documents_state"), table_name="documents")
+    op.drop_index(op.f("ix_documents_blob_updated"), table_name="documents")
+    op.drop_table("documents")
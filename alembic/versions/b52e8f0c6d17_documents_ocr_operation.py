@@ -0,0 +1,37 @@
+"""documents ocr operation
+
+Revision ID: b52e8f0c6d17
+Revises: 7c41d2a9b3e5
+Create Date: 2026-10-18 14:27:45.902113
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b52e8f0c6d17"
+down_revision: Union[str, Sequence[str], None] = "7c41d2a9b3e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "documents", sa.Column("ocr_operation", sa.String(length=256), nullable=True)
+    )
+    op.add_column("documents", sa.Column("ocr_parts", sa.JSON(), nullable=True))
+    op.create_index(
+        op.f("ix_documents_ocr_operation"), "documents", ["ocr_operation"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_documents_ocr_operation"), table_name="documents")
+    op.drop_column("documents", "ocr_parts")
+    op.drop_column("documents", "ocr_operation")
@@ -0,0 +1,53 @@
+"""
+Add the `source` payload field (and payload indexes) to points ingested before
+it was written at upsert time, using the chunk -> document mapping in Postgres.
+Re-ingesting does not do this: unchanged chunks are skipped before the upsert
+(INGEST_SKIP_UNCHANGED), so their points keep their old payload.
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/backfill_qdrant_sources.py [collection]
+"""
+
+import sys
+from collections import defaultdict
+
+from qdrant_client.models import Filter, IsEmptyCondition, PayloadField
+
+from storage.db.read import get_chunk_sources
+from storage.vector.collection import ensure_payload_indexes, qdrant_client
+from utils.config import settings
+
+
+def main():
+    collection = sys.argv[1] if len(sys.argv) > 1 else settings.QDRANT_COLLECTION
+    ensure_payload_indexes(qdrant_client, collection)
+    missing_source = Filter(
+        must=[IsEmptyCondition(is_empty=PayloadField(key="source"))]
+    )
+
+    updated = 0
+    while True:
+        # Updated points drop out of the filter, so always read the first page
+        points, _ = qdrant_client.scroll(
+            collection_name=collection,
+            scroll_filter=missing_source,
+            limit=1000,
+            with_payload=False,
+            with_vectors=False,
+        )
+        if not points:
+            break
+        sources = get_chunk_sources([str(point.id) for point in points])
+        by_source = defaultdict(list)
+        for point in points:
+            by_source[sources.get(str(point.id), "?")].append(point.id)
+        for source, ids in by_source.items():
+            qdrant_client.set_payload(
+                collection_name=collection, payload={"source": source}, points=ids
+            )
+        updated += len(points)
+        print(f"Backfilled {updated} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the per-object ORM chunk write with the bulk INSERT ... ON CONFLICT path.
+
+Usage (from the repo root, with the Postgres settings from .env):
+    PYTHONPATH=src python scripts/bench_chunk_writes.py [n_chunks] [batch_size]
+
+Rows are written under a throwaway source and deleted afterwards.
+"""
+
+import sys
+import time
+import uuid
+
+from storage.db.models import Chunk
+from storage.db.session import get_db_session
+from storage.db.write import insert_chunks_in_postgres
+
+BENCH_SOURCE = "bench://chunk-writes"
+
+
+def insert_chunks_orm(source_pdf: str, chunks: list):
+    """The previous write path: one ORM object and session.add per chunk."""
+    with get_db_session() as session:
+        for chunk in chunks:
+            session.add(
+                Chunk(
+                    id=chunk["id"],
+                    source=source_pdf,
+                    type=chunk["type"],
+                    text=chunk["text"],
+                    page=chunk.get("page"),
+                )
+            )
+        session.commit()
+
+
+def make_chunks(n):
+    text = "Torque the M8 flange bolts to 25 Nm in a star pattern. " * 8
+    return [
+        {"id": str(uuid.uuid4()), "type": "paragraph", "text": text, "page": i % 300}
+        for i in range(n)
+    ]
+
+
+def cleanup():
+    with get_db_session() as session:
+        session.query(Chunk).filter(Chunk.source == BENCH_SOURCE).delete()
+        session.commit()
+
+
+def run(label, write, chunks, batch_size):
+    cleanup()
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        write(BENCH_SOURCE, chunks[i : i + batch_size])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.2f}s  {len(chunks) / elapsed:10.0f} rows/s")
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    chunks = make_chunks(n)
+    print(f"{n} chunks, {batch_size} chunks per task batch")
+
+    try:
+        orm = run("ORM session.add", insert_chunks_orm, chunks, batch_size)
+        bulk = run("bulk ON CONFLICT", insert_chunks_in_postgres, chunks, batch_size)
+        print(f"speedup: {orm / bulk:.1f}x")
+
+        # Same batches again: must overwrite, not fail on duplicate keys
+        run("bulk ON CONFLICT (rerun)", insert_chunks_in_postgres, chunks, batch_size)
+        big = run("bulk, one call", insert_chunks_in_postgres, chunks, len(chunks))
+        print(f"single-call speedup over ORM: {orm / big:.1f}x")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Embedding throughput: fixed 64-text batches in arrival order vs length-sorted,
+token-budgeted batches (llm.embeddings.plan_batches).
+
+Runs the fastembed model in-process so only the batching strategy differs.
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/bench_embed_batching.py [n_texts] [cache_dir]
+"""
+
+import random
+import sys
+import time
+
+from fastembed import TextEmbedding
+
+from llm.embeddings import estimate_tokens, plan_batches
+from utils.config import settings
+
+WORDS = "torque flange bolt valve seal pump pressure rpm clearance shaft".split()
+
+
+def make_texts(n, seed=0):
+    """Mostly short paragraphs, some long ones and a few large tables."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.80:
+            n_words = rng.randint(15, 60)
+        elif kind < 0.95:
+            n_words = rng.randint(120, 250)
+        else:
+            n_words = rng.randint(350, 450)
+        texts.append(" ".join(rng.choice(WORDS) for _ in range(n_words)))
+    return texts
+
+
+def run(model, batches):
+    start = time.perf_counter()
+    for batch in batches:
+        list(model.embed(batch, batch_size=len(batch)))
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else "/app/nlp"
+    model = TextEmbedding(model_name=settings.EMBEDDING_MODEL, cache_dir=cache_dir)
+    texts = make_texts(n)
+    token_counts = [estimate_tokens(text) for text in texts]
+
+    fixed = [texts[i : i + 64] for i in range(0, n, 64)]
+    planned = [
+        [texts[i] for i in indices]
+        for indices in plan_batches(token_counts, 64, settings.EMBED_MAX_BATCH_TOKENS)
+    ]
+
+    run(model, fixed[:2])  # warm-up
+    fixed_time = run(model, fixed)
+    planned_time = run(model, planned)
+    print(f"{n} texts, model {settings.EMBEDDING_MODEL}")
+    print(
+        f"fixed 64, arrival order : {n / fixed_time:8.1f} texts/s ({len(fixed)} requests)"
+    )
+    print(
+        f"length-sorted, budgeted : {n / planned_time:8.1f} texts/s "
+        f"({len(planned)} requests)"
+    )
+    print(f"speedup: {fixed_time / planned_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
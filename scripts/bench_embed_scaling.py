@@ -0,0 +1,76 @@
+"""
+Throughput-vs-cores scaling report for the embedding inference pool.
+
+For each (sessions, threads per session) layout that fits on this machine,
+embeds the same texts through llm.inference_pool.InferencePool with several
+batches in flight, as the micro-batcher does, and prints texts/s.
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/bench_embed_scaling.py [n_texts] [cache_dir]
+"""
+
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastembed import TextEmbedding
+
+from llm.inference_pool import InferencePool
+from utils.config import settings
+
+WORDS = "torque flange bolt valve seal pump pressure rpm clearance shaft".split()
+
+
+def layouts(cores):
+    """(sessions, threads) pairs using at most `cores` threads in total."""
+    result = []
+    sessions = 1
+    while sessions <= cores:
+        threads = 1
+        while sessions * threads <= cores:
+            result.append((sessions, threads))
+            threads *= 2
+        sessions *= 2
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else "/app/nlp"
+    cores = os.cpu_count() or 1
+    rng = random.Random(0)
+    texts = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120)))
+        for _ in range(n)
+    ]
+    batches = [texts[i : i + 64] for i in range(0, n, 64)]
+
+    print(f"{n} texts, model {settings.EMBEDDING_MODEL}, {cores} cores")
+    print(f"{'sessions':>8} {'threads':>8} {'cores':>6} {'texts/s':>10} {'scaling':>8}")
+    baseline = None
+    for sessions, threads in layouts(cores):
+        pool = InferencePool(
+            lambda: TextEmbedding(
+                model_name=settings.EMBEDDING_MODEL,
+                cache_dir=cache_dir,
+                threads=threads,
+            ),
+            size=sessions,
+        )
+        pool.embed(batches[0])  # warm-up
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            start = time.perf_counter()
+            list(executor.map(pool.embed, batches))
+            elapsed = time.perf_counter() - start
+        rate = n / elapsed
+        baseline = baseline or rate
+        print(
+            f"{sessions:>8} {threads:>8} {sessions * threads:>6} "
+            f"{rate:>10.1f} {rate / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Recall and latency of hybrid (dense + sparse, RRF) vs dense-only retrieval.
+
+Builds a labelled sample, embeds it through the embedding service (dense
+/embed and sparse /embed_sparse, so SPARSE_MODEL must be set there), loads it
+into a temporary hybrid collection and runs every query through
+storage.vector.read.search_chunks three ways: dense only, hybrid with Qdrant's
+server-side RRF, and hybrid with client-side weighted RRF.
+
+The sample is either a JSONL corpus of {"id", "text"} chunks or a synthetic
+technical corpus. Queries are labelled from the corpus itself:
+- "identifier": a part number or error code, relevant = chunks containing it
+- "passage": a 12-word window of one chunk, relevant = that chunk
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/bench_hybrid_retrieval.py \\
+        [qdrant_url|:memory:] [corpus.jsonl] [n_queries]
+"""
+
+import json
+import random
+import re
+import statistics
+import sys
+import time
+import uuid
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Batch, Distance, SparseVector
+
+import storage.vector.read as vector_read
+from llm.embeddings import embed_texts_batched, embed_texts_remote, embed_texts_sparse
+from storage.vector.collection import (
+    DENSE_VECTOR,
+    SPARSE_VECTOR,
+    ensure_qdrant_collection,
+)
+from storage.vector.read import search_chunks
+
+TOP_K = 5
+WEIGHTS = (1.0, 2.0)
+IDENTIFIER = re.compile(r"\b(?=[A-Z0-9-]*\d)[A-Z][A-Z0-9]*-[A-Z0-9-]+\b|\bE\d{3,}\b")
+WORDS = (
+    "torque flange bolt valve seal pump pressure rpm clearance shaft bearing "
+    "gasket coupling impeller housing nominal tolerance lubricant inspection "
+    "replace tighten check alarm fault sensor reading limit maximum minimum"
+).split()
+
+
+def synthetic_corpus(n=2000, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n):
+        part = f"{rng.choice(['PN', 'VX', 'HB', 'SK'])}-{rng.randint(0, 99999):05d}"
+        code = f"E{rng.randint(100, 9999)}"
+        words = rng.choices(WORDS, k=60)
+        words.insert(rng.randint(0, 60), part)
+        words.insert(rng.randint(0, 60), f"alarm {code}")
+        corpus.append({"id": str(uuid.UUID(int=i)), "text": " ".join(words)})
+    return corpus
+
+
+def load_corpus(path):
+    with open(path) as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+def labelled_queries(corpus, n, seed=1):
+    rng = random.Random(seed)
+    containing = {}
+    for chunk in corpus:
+        for identifier in set(IDENTIFIER.findall(chunk["text"])):
+            containing.setdefault(identifier, set()).add(chunk["id"])
+    identifiers = sorted(containing)
+    queries = []
+    for identifier in rng.sample(identifiers, min(n // 2, len(identifiers))):
+        queries.append(("identifier", identifier, containing[identifier]))
+    for chunk in rng.sample(corpus, min(n - len(queries), len(corpus))):
+        words = chunk["text"].split()
+        start = rng.randint(0, max(0, len(words) - 12))
+        queries.append(("passage", " ".join(words[start : start + 12]), {chunk["id"]}))
+    return queries
+
+
+def load_collection(client, collection, corpus):
+    texts = [chunk["text"] for chunk in corpus]
+    dense = embed_texts_batched(texts)
+    sparse = embed_texts_sparse(texts)
+    ensure_qdrant_collection(
+        client, collection, len(dense[0]), Distance.COSINE, hybrid=True
+    )
+    for start in range(0, len(corpus), 256):
+        end = start + 256
+        client.upsert(
+            collection_name=collection,
+            points=Batch(
+                ids=[chunk["id"] for chunk in corpus[start:end]],
+                vectors={
+                    DENSE_VECTOR: [list(map(float, v)) for v in dense[start:end]],
+                    SPARSE_VECTOR: [SparseVector(**s) for s in sparse[start:end]],
+                },
+                payloads=[{"id": chunk["id"]} for chunk in corpus[start:end]],
+            ),
+        )
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else ":memory:"
+    corpus = load_corpus(sys.argv[2]) if len(sys.argv) > 2 else synthetic_corpus()
+    n_queries = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    client = QdrantClient(location=url) if url == ":memory:" else QdrantClient(url)
+    # search_chunks uses the module-level client
+    vector_read.qdrant_client = client
+    collection = "bench_hybrid"
+    if client.collection_exists(collection):
+        client.delete_collection(collection)
+    load_collection(client, collection, corpus)
+
+    queries = labelled_queries(corpus, n_queries)
+    modes = {
+        "dense": lambda q, s: search_chunks(q, collection, TOP_K, hybrid=True),
+        "hybrid rrf": lambda q, s: search_chunks(
+            q, collection, TOP_K, sparse_embedding=s, hybrid=True, weights=(1, 1)
+        ),
+        f"hybrid w={WEIGHTS}": lambda q, s: search_chunks(
+            q, collection, TOP_K, sparse_embedding=s, hybrid=True, weights=WEIGHTS
+        ),
+    }
+    hits = {(mode, kind): [] for mode in modes for kind, _, _ in queries}
+    latencies = {mode: [] for mode in modes}
+    for kind, text, relevant in queries:
+        dense = embed_texts_remote([text])[0]
+        sparse = embed_texts_sparse([text], query=True)[0]
+        for mode, search in modes.items():
+            start = time.perf_counter()
+            results = search(dense, sparse)
+            latencies[mode].append((time.perf_counter() - start) * 1000)
+            found = {chunk["id"] for chunk in results}
+            hits[(mode, kind)].append(len(found & relevant) / min(len(relevant), TOP_K))
+
+    print(f"{len(corpus)} chunks, {len(queries)} queries, recall@{TOP_K}")
+    print(f"{'mode':<22}{'identifier':>11}{'passage':>9}{'p50 ms':>8}{'p95 ms':>8}")
+    for mode in modes:
+        recall = {
+            kind: statistics.mean(hits[(mode, kind)])
+            for kind in ("identifier", "passage")
+            if hits.get((mode, kind))
+        }
+        p95 = statistics.quantiles(latencies[mode], n=20)[-1]
+        print(
+            f"{mode:<22}{recall.get('identifier', 0):>11.3f}"
+            f"{recall.get('passage', 0):>9.3f}"
+            f"{statistics.median(latencies[mode]):>8.2f}{p95:>8.2f}"
+        )
+    client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Ingestion I/O through cloud_io.object_store: one-at-a-time vs batched calls.
+
+Seeds `n_objects` JSON shards of `size_kb` each under a scratch prefix of the
+configured store, then times listing, downloading them one by one vs with
+read_many, and moving them one by one vs with move_many, before deleting
+everything with delete_many.
+
+Run against the bucket (OBJECT_STORE=gcs, the default) or offline with
+OBJECT_STORE=local OBJECT_STORE_ROOT=/tmp/bucket.
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/bench_object_store.py [n_objects] [size_kb]
+"""
+
+import json
+import random
+import sys
+import time
+
+from cloud_io.object_store import get_object_store
+
+PREFIX = "bench_object_store"
+
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24}{elapsed * 1000:>10.1f}{n / elapsed:>12.1f}")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    store = get_object_store()
+    rng = random.Random(0)
+    names = [f"{PREFIX}/output/doc.pdf/shard-{i:05d}.json" for i in range(n)]
+    for name in names:
+        text = "".join(rng.choices("abcdefghij ", k=size_kb * 1024))
+        store.write(name, json.dumps({"text": text}).encode())
+
+    print(f"{type(store).__name__}: {n} objects x {size_kb} KB")
+    print(f"{'operation':<24}{'ms':>10}{'objects/s':>12}")
+    listed = timed("list", n, lambda: store.list(f"{PREFIX}/output/", ".json"))
+    assert sorted(listed) == names
+    timed("read one by one", n, lambda: [store.read(name) for name in names])
+    timed("read_many", n, lambda: store.read_many(names))
+
+    uris = [store.uri(name) for name in names]
+    half = n // 2
+    timed(
+        "move one by one",
+        half,
+        lambda: [store.move(uri, f"{PREFIX}/single") for uri in uris[:half]],
+    )
+    timed(
+        "move_many", n - half, lambda: store.move_many(uris[half:], f"{PREFIX}/batch")
+    )
+
+    leftovers = store.list(f"{PREFIX}/")
+    timed("delete_many", len(leftovers), lambda: store.delete_many(leftovers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Micro-benchmark for the OCR parser on a synthetic Document AI document.
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/bench_ocr_parser.py [pages] [fragments_per_page]
+
+Compares the previous string-concatenation parser with the current
+offset/join-based one, checks they produce the same chunks, and reports the
+time per page.
+"""
+
+import random
+import sys
+import time
+
+from parsing.ocr_result import extract_text_and_tables, make_chunk_id
+
+WORDS = ["torque", "flange", "M8", "bolt", "valve", "E-042", "seal", "pump", "rpm"]
+
+
+def legacy_text_from_anchor(full_text, anchor):
+    if not anchor or "textSegments" not in anchor:
+        return ""
+    result = ""
+    for segment in anchor["textSegments"]:
+        start = int(segment.get("startIndex", 0))
+        end = int(segment.get("endIndex", 0))
+        result += full_text[start:end]
+    return result
+
+
+def legacy_table_as_markdown(full_text, table):
+    rows = []
+    for row in table.get("headerRows", []) + table.get("bodyRows", []):
+        row_text = [
+            legacy_text_from_anchor(
+                full_text, cell.get("layout", {}).get("textAnchor", {})
+            )
+            for cell in row.get("cells", [])
+        ]
+        rows.append(" | ".join(cell.strip() for cell in row_text))
+    return "\n".join(rows)
+
+
+def legacy_extract(document_proto, min_paragraph_len=50, source=""):
+    """The parser before the rewrite, with the same chunk dicts and IDs."""
+    chunks = []
+
+    def chunk(chunk_type, text, page_number):
+        return {
+            "id": make_chunk_id(source, page_number, chunk_type, text),
+            "type": chunk_type,
+            "text": text,
+            "page": page_number,
+        }
+
+    full_text = document_proto.get("text", "")
+    for page in document_proto.get("pages", []):
+        page_number = page.get("pageNumber")
+        para_buffer = ""
+        for paragraph in page.get("paragraphs", []):
+            para_text = legacy_text_from_anchor(
+                full_text, paragraph.get("layout", {}).get("textAnchor", {})
+            )
+            if not para_text.strip():
+                continue
+            if len(para_text) < min_paragraph_len:
+                para_buffer += " " + para_text.strip()
+            else:
+                if para_buffer:
+                    chunks.append(chunk("paragraph", para_buffer.strip(), page_number))
+                    para_buffer = ""
+                chunks.append(chunk("paragraph", para_text.strip(), page_number))
+        if para_buffer:
+            chunks.append(chunk("paragraph", para_buffer.strip(), page_number))
+        for table in page.get("tables", []):
+            table_text = legacy_table_as_markdown(full_text, table)
+            row_count = len(table.get("bodyRows", [])) + len(
+                table.get("headerRows", [])
+            )
+            if table_text.strip():
+                chunks.append(chunk("table", table_text.strip(), page_number))
+                chunks[-1]["rows"] = row_count
+    return chunks
+
+
+def make_document(n_pages, fragments_per_page, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    offset = 0
+
+    def anchor(text):
+        nonlocal offset
+        parts.append(text)
+        start, offset = offset, offset + len(text)
+        return {"textSegments": [{"startIndex": str(start), "endIndex": str(offset)}]}
+
+    pages = []
+    for page_number in range(1, n_pages + 1):
+        paragraphs = []
+        for _ in range(fragments_per_page):
+            # Mostly short fragments (merged), some full paragraphs
+            n_words = rng.choice([1, 2, 3, 4, 5, 30])
+            text = " ".join(rng.choice(WORDS) for _ in range(n_words)) + "\n"
+            paragraphs.append({"layout": {"textAnchor": anchor(text)}})
+        tables = []
+        for _ in range(2):
+
+            def row():
+                return {
+                    "cells": [
+                        {"layout": {"textAnchor": anchor(rng.choice(WORDS) + " ")}}
+                        for _ in range(5)
+                    ]
+                }
+
+            tables.append(
+                {"headerRows": [row()], "bodyRows": [row() for _ in range(20)]}
+            )
+        pages.append(
+            {"pageNumber": page_number, "paragraphs": paragraphs, "tables": tables}
+        )
+    return {"text": "".join(parts), "pages": pages}
+
+
+def best_of(fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    fragments = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    document = make_document(n_pages, fragments)
+    print(f"{n_pages} pages, {fragments} paragraph fragments + 2 tables per page")
+
+    legacy_time, legacy_chunks = best_of(lambda: legacy_extract(document))
+    new_time, new_chunks = best_of(lambda: extract_text_and_tables(document))
+
+    same = legacy_chunks == new_chunks
+    print(f"identical output: {same}")
+    print(f"legacy   {legacy_time * 1e6 / n_pages:9.1f} us/page")
+    print(f"current  {new_time * 1e6 / n_pages:9.1f} us/page")
+    print(f"speedup  {legacy_time / new_time:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Memory saved vs recall lost for the chunks collection storage options.
+
+Loads the same vectors into one collection per configuration (created through
+storage.vector.collection.ensure_qdrant_collection), runs the same queries through
+storage.vector.read.search_params and compares the top-k against exact numpy
+cosine search. RAM is the estimated resident size of vectors + HNSW graph.
+
+Two recall figures are printed:
+- "recall" is measured through Qdrant. The in-process ":memory:" client accepts
+  quantization settings but always searches exactly, so it is not reported
+  there; point the script at a real Qdrant for it.
+- "emulated" replays the quantized search in numpy: int8 (0.99 quantile) or
+  1-bit scoring picks limit x oversampling candidates, which are rescored with
+  the original vectors when QDRANT_SEARCH_RESCORE is on. The search is exact,
+  so this isolates the quantization loss from the HNSW approximation.
+
+Vectors are synthetic clustered unit vectors unless a .npy file of real
+embeddings is given.
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/bench_qdrant_quantization.py \\
+        [qdrant_url] [n_vectors] [embeddings.npy]
+"""
+
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Batch, Distance
+
+from storage.vector.collection import ensure_qdrant_collection
+from storage.vector.read import search_params
+from utils.config import settings
+
+DIM = 768
+QUERIES = 200
+TOP_K = 10
+HNSW_M = 16
+
+# name: (quantization, vectors_on_disk, hnsw_on_disk)
+CONFIGS = {
+    "float32": ("", False, False),
+    "scalar": ("scalar", False, False),
+    "scalar+disk": ("scalar", True, True),
+    "binary": ("binary", False, False),
+    "binary+disk": ("binary", True, True),
+}
+
+
+def synthetic_vectors(n, dim, clusters=64, seed=0):
+    """Unit vectors around random centroids, roughly like text embeddings."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim))
+    vectors = centroids[rng.integers(0, clusters, n)]
+    vectors = vectors + 0.6 * rng.standard_normal((n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def estimated_ram(n, dim, quantization, vectors_on_disk, hnsw_on_disk):
+    """Bytes kept in RAM: originals, quantized copy and HNSW links."""
+    ram = 0 if vectors_on_disk else n * dim * 4
+    if quantization == "scalar":
+        ram += n * dim
+    elif quantization == "binary":
+        ram += n * dim // 8
+    if not hnsw_on_disk:
+        ram += n * HNSW_M * 2 * 4
+    return ram
+
+
+def quantized_scores(queries, vectors, quantization):
+    """Query x vector scores as Qdrant's quantized index computes them."""
+    if quantization == "scalar":
+        low, high = np.quantile(vectors, [0.005, 0.995])
+        step = (high - low) / 255
+
+        def int8(x):
+            return np.round((np.clip(x, low, high) - low) / step) * step + low
+
+        return int8(queries) @ int8(vectors).T
+    if quantization == "binary":
+        # One sign bit per dimension; the dot product of the +/-1 vectors is
+        # dims - 2 x Hamming distance, so it ranks like Qdrant's bit score
+        return np.where(queries > 0, 1.0, -1.0) @ np.where(vectors > 0, 1.0, -1.0).T
+    return queries @ vectors.T
+
+
+def emulated_recall(
+    queries,
+    vectors,
+    truth,
+    quantization,
+    rescore=settings.QDRANT_SEARCH_RESCORE,
+    oversampling=settings.QDRANT_SEARCH_OVERSAMPLING,
+):
+    """Recall@k of a quantized exact search with oversampling and rescoring."""
+    k = truth.shape[1]
+    scores = quantized_scores(queries, vectors, quantization)
+    if not quantization:
+        top = np.argsort(-scores, axis=1)[:, :k]
+    else:
+        candidates = np.argsort(-scores, axis=1)[:, : max(k, int(k * oversampling))]
+        if rescore:
+            exact = np.einsum("qd,qcd->qc", queries, vectors[candidates])
+            order = np.argsort(-exact, axis=1)
+        else:
+            order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+        top = np.take_along_axis(candidates, order, axis=1)[:, :k]
+    hits = sum(len(set(a.tolist()) & set(b.tolist())) for a, b in zip(top, truth))
+    return hits / truth.size
+
+
+def wait_indexed(client, collection, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(collection).status == "green":
+            return
+        time.sleep(0.5)
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:6333"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    if len(sys.argv) > 3:
+        vectors = np.load(sys.argv[3]).astype(np.float32)[:n]
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    else:
+        vectors = synthetic_vectors(n, DIM)
+    n, dim = vectors.shape
+
+    local = url == ":memory:"
+    client = QdrantClient(location=url) if local else QdrantClient(url)
+    if local:
+        print("Local mode: quantization is ignored, only emulated recall is shown")
+
+    # Hold out queries near, but not in, the corpus
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, n, QUERIES)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape)
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(
+        np.float32
+    )
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :TOP_K]
+
+    print(f"{n} vectors x {dim} dims, {QUERIES} queries, recall@{TOP_K}")
+    print(
+        f"{'config':<14}{'ram MB':>9}{'saved':>8}{'recall':>8}{'emulated':>10}"
+        f"{'ms/query':>10}"
+    )
+    baseline = None
+    for name, (quantization, vectors_on_disk, hnsw_on_disk) in CONFIGS.items():
+        collection = f"bench_quant_{name.replace('+', '_')}"
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+        ensure_qdrant_collection(
+            client,
+            collection,
+            dim,
+            Distance.COSINE,
+            quantization=quantization,
+            vectors_on_disk=vectors_on_disk,
+            hnsw_on_disk=hnsw_on_disk,
+        )
+        for start in range(0, n, 1000):
+            client.upsert(
+                collection_name=collection,
+                points=Batch(
+                    ids=list(range(start, min(start + 1000, n))),
+                    vectors=vectors[start : start + 1000].tolist(),
+                ),
+            )
+        wait_indexed(client, collection)
+
+        hits = 0
+        start = time.perf_counter()
+        for query, expected in zip(queries, truth):
+            result = client.search(
+                collection_name=collection,
+                query_vector=query.tolist(),
+                limit=TOP_K,
+                search_params=search_params(),
+            )
+            hits += len({hit.id for hit in result} & set(expected.tolist()))
+        elapsed_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+        ram = estimated_ram(n, dim, quantization, vectors_on_disk, hnsw_on_disk)
+        baseline = baseline or ram
+        recall = "-" if local else f"{hits / (QUERIES * TOP_K):.3f}"
+        emulated = emulated_recall(queries, vectors, truth, quantization)
+        print(
+            f"{name:<14}{ram / 2**20:>9.1f}{1 - ram / baseline:>8.0%}"
+            f"{recall:>8}{emulated:>10.3f}{elapsed_ms:>10.2f}"
+        )
+        client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Load test for /embed with many concurrent single-text query embeddings.
+
+Usage (from the repo root, embedding service running):
+    PYTHONPATH=src python scripts/load_test_embed.py [concurrency] [seconds] [endpoint]
+
+Run it once against a service with EMBED_MICRO_BATCHING=false and once with
+it enabled to compare. Reports throughput and latency percentiles against
+EMBED_LATENCY_BUDGET_MS.
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+import httpx
+
+from utils.config import settings
+
+QUESTIONS = [
+    "What is the torque for the M8 flange bolts?",
+    "How do I reset error code E-042 on the pump controller?",
+    "Which seal kit fits the 40 mm shaft?",
+    "What clearance is required between impeller and casing?",
+    "How often should the bearing grease be replaced?",
+]
+
+
+async def client_loop(client, endpoint, stop_at, latencies, rng):
+    while time.perf_counter() < stop_at:
+        # A unique suffix keeps the embedding cache from answering
+        text = f"{rng.choice(QUESTIONS)} #{rng.random()}"
+        start = time.perf_counter()
+        resp = await client.post(endpoint, json={"texts": [text]})
+        resp.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    endpoint = sys.argv[3] if len(sys.argv) > 3 else settings.EMBEDDING_API_ENDPOINT
+
+    latencies = []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        stop_at = time.perf_counter() + seconds
+        await asyncio.gather(
+            *[
+                client_loop(client, endpoint, stop_at, latencies, random.Random(i))
+                for i in range(concurrency)
+            ]
+        )
+
+    latencies.sort()
+    budget = settings.EMBED_LATENCY_BUDGET_MS
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    print(f"{concurrency} concurrent clients, {seconds:.0f}s against {endpoint}")
+    print(f"throughput: {len(latencies) / seconds:8.1f} embeddings/s")
+    print(
+        f"p50 {pct(0.50):7.1f} ms   p95 {pct(0.95):7.1f} ms   p99 {pct(0.99):7.1f} ms"
+    )
+    verdict = "within" if pct(0.99) <= budget else "OVER"
+    print(f"p99 is {verdict} the {budget:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
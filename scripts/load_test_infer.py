@@ -0,0 +1,99 @@
+"""
+Concurrency scaling load test for /infer_stream.
+
+Logs in once, then for each concurrency level fires that many /infer_stream
+requests at the same time and waits for every stream to finish. When the
+request path never blocks the event loop, wall time stays close to a single
+request's and throughput grows with concurrency; a blocking path serializes
+requests and wall time grows linearly instead.
+
+The route is rate limited per client, so run the API with a high
+INFER_RATE_LIMIT (e.g. "10000/minute") for the duration of the test.
+
+Usage (from the repo root, full stack running):
+    PYTHONPATH=src python scripts/load_test_infer.py \\
+        username password [base_url] [max_concurrency]
+"""
+
+import asyncio
+import random
+import re
+import sys
+import time
+
+import httpx
+
+QUESTIONS = [
+    "What is the torque for the M8 flange bolts?",
+    "How do I reset error code E-042 on the pump controller?",
+    "Which seal kit fits the 40 mm shaft?",
+    "What clearance is required between impeller and casing?",
+    "How often should the bearing grease be replaced?",
+]
+
+
+async def login(client, username, password):
+    page = await client.get("/login")
+    csrf_token = re.search(r'name="csrf_token" value="([^"]+)"', page.text).group(1)
+    resp = await client.post(
+        "/login",
+        data={"username": username, "password": password, "csrf_token": csrf_token},
+    )
+    if resp.status_code != 302:
+        raise SystemExit(f"Login failed with status {resp.status_code}")
+
+
+async def one_stream(client, rng):
+    # A unique suffix keeps the answer cache from short-circuiting generation
+    prompt = f"{rng.choice(QUESTIONS)} ({rng.randint(0, 10**9)})"
+    start = time.perf_counter()
+    first_delta = None
+    params = {"prompt": prompt, "v": 2}
+    async with client.stream("GET", "/infer_stream", params=params) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if line == "event: delta" and first_delta is None:
+                first_delta = time.perf_counter() - start
+    return first_delta or 0.0, time.perf_counter() - start
+
+
+async def main():
+    username, password = sys.argv[1], sys.argv[2]
+    base_url = sys.argv[3] if len(sys.argv) > 3 else "http://localhost:8000"
+    max_concurrency = int(sys.argv[4]) if len(sys.argv) > 4 else 32
+
+    limits = httpx.Limits(max_connections=max_concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120
+    ) as client:
+        await login(client, username, password)
+        rng = random.Random(0)
+
+        print(
+            f"{'clients':>8}{'wall s':>9}{'req/s':>8}{'p50 ttft':>10}{'p50 total':>11}"
+        )
+        baseline = None
+        concurrency = 1
+        while concurrency <= max_concurrency:
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *[one_stream(client, rng) for _ in range(concurrency)]
+            )
+            wall = time.perf_counter() - start
+            baseline = baseline or wall
+            first_events = sorted(first for first, _ in results)
+            totals = sorted(total for _, total in results)
+            print(
+                f"{concurrency:>8}{wall:>9.2f}{concurrency / wall:>8.2f}"
+                f"{first_events[len(results) // 2]:>10.2f}"
+                f"{totals[len(results) // 2]:>11.2f}"
+            )
+            concurrency *= 2
+        print(
+            f"wall time at {concurrency // 2} clients is {wall / baseline:.1f}x a "
+            "single request (1.0x = perfect scaling)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
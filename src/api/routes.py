@@ -1,15 +1,27 @@
-import json
+import asyncio
 import os
+import re
+import time
+import uuid
 
 from fastapi import APIRouter, Form, Request, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
-from llm.completions import ask_llm_lambda_stream
-from llm.embeddings import embed_texts_remote
-from services.retrieval_service import build_rag_prompt
-from storage.vector.read import search_chunks
-from storage.db.read import get_chunk_sources
+from api.sse import answer_events
+from cloud_io.gcs import generate_gcs_signed_url
+
+from llm.completions import ask_llm_lambda_stream_async
+from llm.embeddings import embed_texts_async, embed_texts_sparse_async
+from services.answer_cache import answer_cache_stats, lookup_answer, store_answer
+from services.retrieval_service import (
+    build_rag_prompt,
+    build_references,
+    rerank_chunks_async,
+)
+from storage.vector.collection import async_qdrant_client
+from storage.vector.read import search_chunks_async
 from storage.db.auth import verify_password
 from storage.db.session import get_db_session_di
 from storage.db.models import User
@@ -138,42 +150,140 @@ async def get_infer(request: Request, user=Depends(get_current_user_session)):
     return templates.TemplateResponse("infer.html", {"request": request, "user": user})
 
 
+async def replay_answer(answer):
+    """
+    Yield a cached answer a few words at a time, like a live LLM stream but
+    without waiting on it.
+    """
+    pieces = re.findall(r"\S+\s*", answer)
+    for start in range(0, len(pieces), 8):
+        yield "".join(pieces[start : start + 8])
+
+
+@router.get("/answer_cache/stats")
+async def get_answer_cache_stats(user=Depends(get_current_user_session)):
+    return answer_cache_stats()
+
+
+@router.get("/source/{chunk_id}")
+async def get_source(chunk_id: str, user=Depends(get_current_user_session)):
+    """
+    Redirect to a freshly signed URL for a chunk's source PDF, at its page.
+    Used by citation links in CITATION_LINKS="redirect" mode.
+    """
+    try:
+        uuid.UUID(chunk_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Unknown source")
+    points = await async_qdrant_client.retrieve(
+        settings.QDRANT_COLLECTION, ids=[chunk_id], with_payload=True
+    )
+    if not points or not points[0].payload.get("source"):
+        raise HTTPException(status_code=404, detail="Unknown source")
+    payload = points[0].payload
+    url = await run_in_threadpool(generate_gcs_signed_url, payload["source"])
+    page = payload.get("page")
+    return RedirectResponse(
+        f"{url}#page={page}" if page else url, status_code=status.HTTP_302_FOUND
+    )
+
+
 @router.get("/infer_stream")
-@limiter.limit("5/minute")
+@limiter.limit(settings.INFER_RATE_LIMIT)
 async def infer_stream(
     request: Request,
     prompt: str = Query(..., min_length=5, max_length=512),
-    db: Session = Depends(get_db_session_di),
+    source: str | None = Query(None),
+    v: int = Query(1, ge=1, le=2),
     user=Depends(get_current_user_session),
 ):
     """
     SSE endpoint: streams the answer and references chunk by chunk as they arrive.
     The prompt is passed as a query parameter for EventSource compatibility.
+
+    Nothing here blocks the event loop: embedding, Qdrant and the LLM use async
+    clients, the user lookup is a sync dependency that FastAPI runs in its
+    threadpool, and the remaining sync calls (answer cache, signed URLs) are
+    offloaded explicitly.
+
+    `v` selects the event protocol (see api.sse.answer_events): 1 repeats the
+    full answer in every event, 2 streams deltas and ends with a "done" event.
     """
     prompt = sanitize_prompt(prompt)
     if not prompt or len(prompt) < 5:
         raise HTTPException(status_code=400, detail="Prompt is invalid or too short.")
 
+    request_started = time.perf_counter()
     user_query = prompt.strip()
-    query_embedding = embed_texts_remote([user_query])[0]
-    retrieved_chunks = search_chunks(query_embedding, limit=5)
-    chunk_ids = [chunk["id"] for chunk in retrieved_chunks if "id" in chunk]
-    # Lookup doc names from Postgres
-    chunk_id_to_doc = get_chunk_sources(chunk_ids) if chunk_ids else {}
-
-    # Add doc name to each chunk
-    for chunk in retrieved_chunks:
-        chunk["source"] = chunk_id_to_doc.get(chunk.get("id"), "?")
-
-    rag_prompt, references = build_rag_prompt(user_query, retrieved_chunks)
-
-    def event_stream():
-        answer_buffer = ""
-        for chunk in ask_llm_lambda_stream(rag_prompt):
-            # Stream each answer chunk as it is generated
-            answer_buffer += chunk
-            event = f"data: {json.dumps({'answer': answer_buffer, 'references': references})}\n\n"
+    scope = source or ""
+    # The sparse query vector does not depend on the dense one; fetch both at once
+    sparse_task = None
+    if settings.QDRANT_HYBRID:
+        sparse_task = asyncio.create_task(
+            embed_texts_sparse_async([user_query], query=True)
+        )
+    try:
+        query_embedding = (await embed_texts_async([user_query]))[0]
+        if settings.ANSWER_CACHE_ENABLED:
+            cached = await run_in_threadpool(lookup_answer, query_embedding, scope)
+            if cached:
+                references = await run_in_threadpool(build_references, cached["chunks"])
+                events = answer_events(
+                    replay_answer(cached["answer"]),
+                    references,
+                    protocol=v,
+                    started=request_started,
+                    cached=True,
+                    window_ms=0,
+                )
+                return StreamingResponse(events, media_type="text/event-stream")
+        sparse_embedding = (await sparse_task)[0] if sparse_task else None
+    finally:
+        if sparse_task and not sparse_task.done():
+            sparse_task.cancel()
+
+    started = time.perf_counter()
+    # Over-fetch candidates when the reranker picks the final top N
+    limit = settings.RERANK_CANDIDATES if settings.RERANK_ENABLED else 5
+    # Doc names come from the Qdrant payload; no Postgres lookup needed
+    retrieved_chunks = await search_chunks_async(
+        query_embedding, limit=limit, source=source, sparse_embedding=sparse_embedding
+    )
+    if settings.RERANK_ENABLED:
+        retrieved_chunks = await rerank_chunks_async(user_query, retrieved_chunks)
 
-            yield event
+    rag_prompt, references = await run_in_threadpool(
+        build_rag_prompt, user_query, retrieved_chunks
+    )
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    retrieval_ms = (time.perf_counter() - request_started) * 1000
+    usage = {}
+
+    async def generate():
+        answer = []
+        async for chunk in ask_llm_lambda_stream_async(rag_prompt, usage=usage):
+            answer.append(chunk)
+            yield chunk
+
+        if settings.ANSWER_CACHE_ENABLED and answer:
+            await run_in_threadpool(
+                store_answer,
+                query_embedding,
+                user_query,
+                "".join(answer),
+                retrieved_chunks,
+                generation_ms=(time.perf_counter() - started) * 1000,
+                scope=scope,
+            )
+
+    events = answer_events(
+        generate(),
+        references,
+        protocol=v,
+        started=request_started,
+        timing={"retrieval_ms": retrieval_ms},
+        usage=usage,
+        window_ms=settings.SSE_COALESCE_MS,
+        max_chars=settings.SSE_COALESCE_CHARS,
+    )
+    return StreamingResponse(events, media_type="text/event-stream")
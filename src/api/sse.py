@@ -0,0 +1,114 @@
+# api/sse.py
+
+import asyncio
+import json
+import time
+
+
+def sse_event(data, event=None):
+    """
+    One Server-Sent Event; `event` names it for addEventListener on the client.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def coalesce(chunks, window_ms=50, max_chars=256):
+    """
+    Merge text from the async iterator `chunks` into larger pieces: a piece is
+    emitted once `window_ms` has passed since the previous one or it reaches
+    `max_chars`, whichever comes first, and never waits on the next chunk
+    longer than the window. The first chunk is emitted immediately.
+    """
+    iterator = aiter(chunks)
+    pending = []
+    pending_chars = 0
+    window = window_ms / 1000
+    # The first chunk goes out at once, so time to first token is unchanged
+    flushed_at = float("-inf")
+    next_chunk = asyncio.ensure_future(anext(iterator))
+    try:
+        while True:
+            timeout = max(0.0, flushed_at + window - time.perf_counter())
+            done, _ = await asyncio.wait(
+                {next_chunk}, timeout=timeout if pending else None
+            )
+            if not done:
+                # Window elapsed while the source is still producing
+                yield "".join(pending)
+                pending, pending_chars = [], 0
+                flushed_at = time.perf_counter()
+                continue
+            try:
+                text = next_chunk.result()
+            except StopAsyncIteration:
+                break
+            pending.append(text)
+            pending_chars += len(text)
+            next_chunk = asyncio.ensure_future(anext(iterator))
+            if pending_chars >= max_chars or time.perf_counter() - flushed_at >= window:
+                yield "".join(pending)
+                pending, pending_chars = [], 0
+                flushed_at = time.perf_counter()
+        if pending:
+            yield "".join(pending)
+    finally:
+        if not next_chunk.done():
+            next_chunk.cancel()
+
+
+async def answer_events(
+    chunks,
+    references,
+    protocol=2,
+    started=None,
+    timing=None,
+    usage=None,
+    cached=False,
+    window_ms=50,
+    max_chars=256,
+):
+    """
+    SSE events for a streamed answer.
+
+    Protocol 1 (legacy) repeats the whole answer so far and every reference
+    in each event, so bytes grow quadratically with answer length. Protocol 2
+    sends one "references" event, then "delta" events with only the new text
+    (coalesced, see coalesce), then a "done" event with token `usage` and
+    timings measured from `started` (perf_counter), plus any `timing` already
+    known, such as retrieval time.
+    """
+    if protocol == 1:
+        answer = ""
+        async for chunk in chunks:
+            answer += chunk
+            yield sse_event({"answer": answer, "references": references})
+        return
+
+    started = started or time.perf_counter()
+    yield sse_event({"references": references, "cached": cached}, "references")
+    if window_ms > 0:
+        chunks = coalesce(chunks, window_ms, max_chars)
+    first_delta_ms = None
+    deltas = 0
+    chars = 0
+    async for text in chunks:
+        if first_delta_ms is None:
+            first_delta_ms = (time.perf_counter() - started) * 1000
+        deltas += 1
+        chars += len(text)
+        yield sse_event({"text": text}, "delta")
+    yield sse_event(
+        {
+            "usage": usage or {},
+            "timing": {
+                **(timing or {}),
+                "first_delta_ms": first_delta_ms,
+                "total_ms": (time.perf_counter() - started) * 1000,
+            },
+            "deltas": deltas,
+            "chars": chars,
+            "cached": cached,
+        },
+        "done",
+    )
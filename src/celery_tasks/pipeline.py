@@ -1,84 +1,321 @@
 import logging
-from this import d
+from datetime import timedelta
+from itertools import chain
+
+import redis
 
 from celery_tasks.scheduling import celery_app
-from cloud_io.gcp_ocr import batch_process_pdf_gcs
-from cloud_io.gcs import list_gcs_files_with_prefix, move_gcs_blob
-from llm.embeddings import embed_texts_batched
-from services.ingestion_service import process_ocr_outputs_from_gcs_yield
+from cloud_io.gcp_ocr import get_ocr_operation, submit_ocr_batch
+from cloud_io.object_store import get_object_store
+from llm.embeddings import embed_texts_batched, embed_texts_sparse
+from services.answer_cache import bump_corpus_version
+from services.ingestion_service import (
+    process_ocr_outputs_from_gcs_yield,
+    prune_stale_chunks,
+    skip_unchanged_chunks,
+)
+from services.ocr_service import (
+    collect_ocr_parts,
+    delete_ocr_parts,
+    ocr_outputs,
+    prepare_ocr_parts,
+)
+from storage.db.ledger import (
+    DISCOVERED,
+    EMBEDDED,
+    FAILED,
+    OCR_DONE,
+    OCR_RUNNING,
+    claim_document,
+    claim_ocr_result,
+    dispatchable_documents,
+    fail_stuck_documents,
+    get_scan_watermark,
+    ocr_in_flight,
+    record_discovered,
+    release_document,
+    start_ocr,
+    touch_documents,
+)
 from storage.db.write import insert_chunks_in_postgres
 from storage.vector.write import upsert_chunks_in_qdrant
 from utils.batch import batch_iterable
 from utils.config import settings
+from utils.exceptions import DocumentProcessingError
+from utils.stages import run_stages
 
 logger = logging.getLogger(__name__)
 
 
-BATCH_SIZE = 64  # Match embedding service
+# Chunks per pipeline batch; embed_texts_batched splits each batch into
+# length-sorted requests within the embedding service limit.
+BATCH_SIZE = 256
 
 
-@celery_app.task(name="ingest.ocr_pdf")
-def ocr_pdf_task(gcs_input: str):
+@celery_app.task(name="ingest.submit_ocr_batch")
+def submit_ocr_batch_task(documents: list):
     """
-    1. Run batch OCR, writing output to GCS.
-    2. Move PDF to 'ocr_done/' folder on success.
-    3. Chain to chunk/embedding step immediately.
+    Claim each [blob_name, generation, source_uri] document, split long PDFs
+    into page ranges and submit everything as one Document AI batch operation.
+
+    Returns the operation name as soon as it is submitted; poll_ocr_operations
+    handles the results, so no worker waits on OCR.
     """
+    claimed = []
+    for blob_name, generation, source_uri in documents:
+        if not claim_document(
+            blob_name, generation, [DISCOVERED, FAILED, OCR_RUNNING], OCR_RUNNING
+        ):
+            logger.info(f"Skipping OCR for {blob_name}@{generation}: not claimable")
+            continue
+        try:
+            parts = prepare_ocr_parts(source_uri, blob_name, generation)
+        except Exception as err:
+            logger.exception(f"Could not prepare {source_uri} for OCR: {err}")
+            release_document(blob_name, generation, FAILED, error=str(err))
+            continue
+        claimed.append((blob_name, generation, parts))
+    if not claimed:
+        return None
+
     try:
-        output_prefix = batch_process_pdf_gcs(gcs_input)
-        logger.info(f"OCR complete for {gcs_input}, output at {output_prefix}")
+        operation = submit_ocr_batch(
+            [part["input"] for _, _, parts in claimed for part in parts]
+        )
+    except Exception as err:
+        for blob_name, generation, _ in claimed:
+            release_document(blob_name, generation, FAILED, error=str(err))
+        raise
+    for blob_name, generation, parts in claimed:
+        start_ocr(blob_name, generation, operation, parts)
+    return operation
 
-        new_uri = move_gcs_blob(gcs_input, "ocr_done")
-        logger.info(f"Moved {gcs_input} to {new_uri}")
 
-        # Chain: immediately kick off next step
-        chunk_embed_pipeline_task.delay(output_prefix, new_uri)
+@celery_app.task(name="ingest.poll_ocr_operations")
+def poll_ocr_operations():
+    """
+    Check every running batch OCR operation once. When one has finished, each
+    of its documents whose page ranges all succeeded is moved to 'ocr_done/'
+    and gets its own chunk/embed task; the others are marked failed.
 
-        return {"output_prefix": output_prefix, "source_pdf": new_uri}
+    Each document is claimed first, so overlapping polls (e.g. a slow one
+    running into the next beat) handle it only once.
+    """
+    store = get_object_store()
+    for operation, docs in ocr_in_flight().items():
+        try:
+            result = get_ocr_operation(operation)
+        except Exception as err:
+            logger.warning(f"Could not poll OCR operation {operation}: {err}")
+            continue
+        if not result["done"]:
+            touch_documents([doc.blob_name for doc in docs])
+            continue
 
-    except Exception as err:
-        logger.exception(f"OCR task failed for {gcs_input}: {err}")
-        raise
+        for doc in docs:
+            if not claim_ocr_result(doc.blob_name, doc.generation, operation):
+                logger.info(f"OCR result for {doc.blob_name} already taken")
+                continue
+            parts, error = collect_ocr_parts(doc.ocr_parts, result)
+            try:
+                if error:
+                    raise DocumentProcessingError(error)
+                new_uri = store.move(doc.source_uri, "ocr_done")
+                delete_ocr_parts(parts, doc.source_uri)
+            except Exception as err:
+                logger.error(f"Batch OCR failed for {doc.source_uri}: {err}")
+                release_document(
+                    doc.blob_name,
+                    doc.generation,
+                    FAILED,
+                    error=str(err),
+                    ocr_parts=parts,
+                )
+                continue
+            logger.info(f"OCR complete for {doc.source_uri}, moved to {new_uri}")
+            release_document(
+                doc.blob_name,
+                doc.generation,
+                OCR_DONE,
+                source_uri=new_uri,
+                ocr_parts=parts,
+            )
+            chunk_embed_pipeline_task.delay(
+                None,
+                new_uri,
+                blob_name=doc.blob_name,
+                generation=doc.generation,
+                parts=ocr_outputs(parts),
+            )
 
 
 @celery_app.task(name="ingest.chunk_embed_pipeline")
-def chunk_embed_pipeline_task(output_prefix: str, source_pdf: str):
+def chunk_embed_pipeline_task(
+    output_prefix: str,
+    source_pdf: str,
+    pipelined: bool = settings.INGEST_PIPELINED,
+    skip_unchanged: bool = settings.INGEST_SKIP_UNCHANGED,
+    blob_name=None,
+    generation=None,
+    parts=None,
+):
     """
     For each batch of chunks in output_prefix:
       - Embed
       - Upsert to Qdrant
       - Write metadata to Postgres
     Moves source_pdf from 'ocr_done/' to 'processed/' when done.
+
+    With `pipelined`, each step runs in its own thread behind a bounded queue,
+    so batch N+1 is embedded while batch N is being written.
+
+    With `skip_unchanged`, chunks whose content-derived ID is already in
+    Postgres and in the target Qdrant collection are not embedded or written
+    again, and chunks of an earlier version of the document that are no longer
+    produced are deleted.
+
+    With `blob_name` and `generation`, the document is claimed in the ledger
+    first, its lock refreshed after each batch, and marked "embedded" (or
+    "failed") at the end.
+
+    `parts` ([[output_prefix, first_page]], from batch OCR of page ranges)
+    replaces `output_prefix`: every range is read in order, with page numbers
+    shifted back to the original document's.
     """
+    tracked = blob_name is not None
+    if tracked and not claim_document(
+        blob_name, generation, [OCR_DONE, FAILED], OCR_DONE
+    ):
+        logger.info(f"Skipping embedding for {blob_name}@{generation}: not claimable")
+        return
     try:
-        chunk_generator = process_ocr_outputs_from_gcs_yield(output_prefix)
+        failed_shards = []
+        seen_ids = set()
+        chunk_generator = chain.from_iterable(
+            process_ocr_outputs_from_gcs_yield(
+                prefix,
+                source=source_pdf,
+                failed_shards=failed_shards,
+                page_offset=first_page - 1,
+            )
+            for prefix, first_page in parts or [[output_prefix, 1]]
+        )
+        if skip_unchanged:
+            chunk_generator = skip_unchanged_chunks(chunk_generator, seen_ids)
         total_chunks = 0
 
-        for chunk_batch in batch_iterable(chunk_generator, BATCH_SIZE):
+        def embed_stage(chunk_batch):
             chunk_texts = [c["text"] for c in chunk_batch]
-            embeddings = embed_texts_batched(chunk_texts)
+            token_counts = [c.get("tokens") for c in chunk_batch]
+            embeddings = embed_texts_batched(chunk_texts, token_counts=token_counts)
+            sparse_embeddings = None
+            if settings.QDRANT_HYBRID:
+                sparse_embeddings = embed_texts_sparse(chunk_texts)
+            return chunk_batch, embeddings, sparse_embeddings
+
+        def qdrant_stage(batch_with_embeddings):
+            chunk_batch, embeddings, sparse_embeddings = batch_with_embeddings
             upsert_chunks_in_qdrant(
-                collection="chunks", chunks=chunk_batch, embeddings=embeddings
+                collection=settings.QDRANT_COLLECTION,
+                chunks=chunk_batch,
+                embeddings=embeddings,
+                source_pdf=source_pdf,
+                sparse_embeddings=sparse_embeddings,
             )
+            return chunk_batch
 
+        def postgres_stage(chunk_batch):
+            nonlocal total_chunks
             insert_chunks_in_postgres(source_pdf=source_pdf, chunks=chunk_batch)
             total_chunks += len(chunk_batch)
+            if tracked:
+                # Keep the claim alive on long documents, so the scan does not
+                # take this run for a dead worker
+                touch_documents([blob_name])
+
+        batches = batch_iterable(chunk_generator, BATCH_SIZE)
+        if pipelined:
+            run_stages(
+                batches,
+                [embed_stage, qdrant_stage, postgres_stage],
+                queue_size=settings.INGEST_QUEUE_SIZE,
+            )
+        else:
+            for chunk_batch in batches:
+                postgres_stage(qdrant_stage(embed_stage(chunk_batch)))
 
         logger.info(f"Chunked/embedded {total_chunks} for {source_pdf}")
-        move_gcs_blob(source_pdf, "processed")
+        pruned = 0
+        if skip_unchanged:
+            if failed_shards:
+                # Missing shards would look like deleted chunks; keep everything
+                logger.warning(
+                    f"Skipping stale chunk pruning for {source_pdf}: "
+                    f"{len(failed_shards)} shard(s) failed to parse"
+                )
+            else:
+                pruned = prune_stale_chunks(source_pdf, seen_ids)
+        if settings.ANSWER_CACHE_ENABLED and (total_chunks or pruned):
+            # Cached answers may no longer reflect the corpus; a cache outage
+            # must not fail the ingestion
+            try:
+                bump_corpus_version()
+            except redis.RedisError as err:
+                logger.warning(f"Answer cache invalidation failed: {err}")
+        processed_uri = get_object_store().move(source_pdf, "processed")
         logger.info(f"Moved {source_pdf} to processed/")
+        if tracked:
+            release_document(blob_name, generation, EMBEDDED, source_uri=processed_uri)
 
     except Exception as err:
         logger.exception(f"Pipeline task failed for {source_pdf}: {err}")
+        if tracked:
+            release_document(blob_name, generation, FAILED, error=str(err))
         raise
 
 
 @celery_app.task(name="ingest.schedule_ocr")
-def schedule_ocr_tasks():
+def schedule_ocr_tasks(overlap_seconds=settings.SCAN_WATERMARK_OVERLAP):
     """
-    Periodically scan '/' for new PDFs and kick off OCR task for each.
+    Periodically scan '/' for new PDFs and dispatch work from the ledger.
+
+    Only PDFs at the bucket root are listed (processed ones live under
+    'ocr_done/' and 'processed/'), and only those updated since the ledger's
+    watermark (minus `overlap_seconds`, for uploads finalized out of order)
+    are recorded. Then every ledger document needing work is dispatched:
+    embedding if its OCR output exists, otherwise OCR, grouped into batch
+    operations of up to OCR_BATCH_DOCUMENTS PDFs. The tasks claim the
+    document before running, so a document is never processed twice at once.
     """
-    pdfs = list_gcs_files_with_prefix("", suffix=".pdf")
-    for blob_name in pdfs:
-        gcs_uri = f"gs://{settings.GCS_BUCKET_NAME}/{blob_name}"
-        ocr_pdf_task.delay(gcs_uri)
+    store = get_object_store()
+    watermark = get_scan_watermark()
+    objects = store.list_info("", suffix=".pdf", recursive=False)
+    if watermark is not None:
+        since = watermark - timedelta(seconds=overlap_seconds)
+        objects = [obj for obj in objects if obj["updated"] >= since]
+    changed = record_discovered(objects)
+    logger.info(
+        f"Scan: {len(objects)} PDF(s) since watermark, {changed} new or changed"
+    )
+
+    stuck = fail_stuck_documents()
+    if stuck:
+        logger.warning(f"Marked {stuck} document(s) failed: out of attempts")
+
+    to_ocr = []
+    for doc in dispatchable_documents():
+        parts = ocr_outputs(doc.ocr_parts)
+        if parts or doc.output_prefix:
+            chunk_embed_pipeline_task.delay(
+                doc.output_prefix,
+                doc.source_uri,
+                blob_name=doc.blob_name,
+                generation=doc.generation,
+                parts=parts,
+            )
+        else:
+            to_ocr.append([doc.blob_name, doc.generation, doc.source_uri])
+    for start in range(0, len(to_ocr), settings.OCR_BATCH_DOCUMENTS):
+        submit_ocr_batch_task.delay(
+            to_ocr[start : start + settings.OCR_BATCH_DOCUMENTS]
+        )
@@ -1,13 +1,49 @@
 import logging
 
 from celery import Celery
+from kombu import Queue
 
 from utils.config import settings
 
 logger = logging.getLogger(__name__)
 
-celery_app = Celery("pipeline", broker=settings.CELERY_BROKER_URL)
-celery_app.conf.task_always_eager = True
+celery_app = Celery(
+    "pipeline",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+
+# Two worker tiers, each consuming one queue and scaled on its own:
+# - io: scanning, OCR submission/polling and object moves, mostly waiting
+#   on GCS, Document AI and Postgres
+# - cpu: chunking and embedding, bound by parsing and the embedding service
+IO_QUEUE = settings.CELERY_IO_QUEUE
+CPU_QUEUE = settings.CELERY_CPU_QUEUE
+
+celery_app.conf.update(
+    task_always_eager=settings.CELERY_ALWAYS_EAGER,
+    task_queues=[Queue(IO_QUEUE), Queue(CPU_QUEUE)],
+    task_default_queue=IO_QUEUE,
+    task_routes={
+        "ingest.schedule_ocr": {"queue": IO_QUEUE},
+        "ingest.submit_ocr_batch": {"queue": IO_QUEUE},
+        "ingest.poll_ocr_operations": {"queue": IO_QUEUE},
+        "ingest.chunk_embed_pipeline": {"queue": CPU_QUEUE},
+    },
+    # Ack after the task finishes, so a crashed worker's task is redelivered;
+    # the document ledger's claims make a redelivered task a no-op if another
+    # worker already picked the document up.
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Default for workers started without --prefetch-multiplier: take one task
+    # at a time, since ingestion tasks are long and uneven
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+    # Unacked tasks are redelivered after this long; keep it above the
+    # longest task so late acks don't cause duplicate runs
+    broker_transport_options={"visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT},
+    result_expires=settings.CELERY_RESULT_EXPIRES,
+    task_track_started=True,
+)
 
 
 from celery.schedules import crontab
@@ -17,6 +53,12 @@ celery_app.conf.beat_schedule = {
         "task": "ingest.schedule_ocr",
         "schedule": crontab(minute="*/30"),
     },
+    "poll-ocr-operations": {
+        "task": "ingest.poll_ocr_operations",
+        "schedule": settings.OCR_POLL_SECONDS,
+        # A poll that waited longer than one interval is superseded by the next
+        "options": {"expires": settings.OCR_POLL_SECONDS},
+    },
 }
 
 
@@ -0,0 +1,111 @@
+import io
+import json
+import os
+import time
+import uuid
+
+from google.cloud import documentai_v1 as documentai
+from google.longrunning import operations_pb2
+from google.rpc import code_pb2, status_pb2
+from pypdf import PdfReader
+
+from cloud_io.object_store import get_object_store
+from utils.config import settings
+
+OPERATIONS_PREFIX = "fake_documentai/operations/"
+
+
+def fake_ocr_document(pdf_bytes, file_name):
+    """
+    Document AI JSON for a PDF: one paragraph per page, holding the page's
+    embedded text, or placeholder text for scanned pages.
+    """
+    text = ""
+    pages = []
+    for number, page in enumerate(PdfReader(io.BytesIO(pdf_bytes)).pages, start=1):
+        page_text = (page.extract_text() or "").strip() or (
+            f"Page {number} of {file_name}: synthetic OCR text standing in for "
+            "the scanned content of this page."
+        )
+        start = len(text)
+        text += page_text + "\n"
+        anchor = {"textSegments": [{"startIndex": start, "endIndex": len(text)}]}
+        pages.append(
+            {"pageNumber": number, "paragraphs": [{"layout": {"textAnchor": anchor}}]}
+        )
+    return {"text": text, "pages": pages}
+
+
+class _Operation:
+    def __init__(self, name):
+        self.operation = operations_pb2.Operation(name=name)
+
+
+class FakeDocumentProcessorServiceClient:
+    """
+    Offline stand-in for documentai.DocumentProcessorServiceClient, covering
+    what the pipeline uses: processor_path, batch_process_documents and
+    get_operation.
+
+    OCR output is written through the object store at submission, so it works
+    with OBJECT_STORE=local; the operation only reports done `latency`
+    seconds later. Operation state is kept in the object store too, so the
+    poller may run in another process than the submitter.
+    """
+
+    def __init__(self, store=None, latency=settings.DOCUMENTAI_FAKE_LATENCY):
+        self.store = store or get_object_store()
+        self.latency = latency
+
+    def processor_path(self, project, location, processor):
+        return f"projects/{project}/locations/{location}/processors/{processor}"
+
+    def batch_process_documents(self, request):
+        operation_id = uuid.uuid4().hex
+        name = f"{request.name.split('/processors/')[0]}/operations/{operation_id}"
+        output_root = request.document_output_config.gcs_output_config.gcs_uri
+        statuses = []
+        for i, document in enumerate(request.input_documents.gcs_documents.documents):
+            destination = f"{output_root.rstrip('/')}/{operation_id}/{i}"
+            status = status_pb2.Status(code=code_pb2.OK)
+            try:
+                pdf_name = self.store.name(document.gcs_uri)
+                stem = os.path.splitext(os.path.basename(pdf_name))[0]
+                output = fake_ocr_document(self.store.read(pdf_name), stem)
+                self.store.write(
+                    f"{self.store.name(destination)}/{stem}-0.json",
+                    json.dumps(output).encode(),
+                )
+            except Exception as err:
+                status = status_pb2.Status(
+                    code=code_pb2.INVALID_ARGUMENT, message=str(err)
+                )
+            statuses.append(
+                documentai.BatchProcessMetadata.IndividualProcessStatus(
+                    input_gcs_source=document.gcs_uri,
+                    status=status,
+                    output_gcs_destination=destination,
+                )
+            )
+        metadata = documentai.BatchProcessMetadata(
+            state=documentai.BatchProcessMetadata.State.SUCCEEDED,
+            individual_process_statuses=statuses,
+        )
+        record = {
+            "done_at": time.time() + self.latency,
+            "metadata": documentai.BatchProcessMetadata.to_json(metadata),
+        }
+        self.store.write(
+            f"{OPERATIONS_PREFIX}{operation_id}.json", json.dumps(record).encode()
+        )
+        return _Operation(name)
+
+    def get_operation(self, request):
+        operation_id = request.name.rsplit("/", 1)[-1]
+        record = self.store.read_json(f"{OPERATIONS_PREFIX}{operation_id}.json")
+        operation = operations_pb2.Operation(
+            name=request.name, done=time.time() >= record["done_at"]
+        )
+        metadata = documentai.BatchProcessMetadata.from_json(record["metadata"])
+        operation.metadata.Pack(documentai.BatchProcessMetadata.pb(metadata))
+        return operation
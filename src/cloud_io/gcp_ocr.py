@@ -1,96 +1,111 @@
 import logging
 import os
+import threading
 
 from google.cloud import documentai_v1 as documentai
-from google.cloud import storage
+from google.longrunning import operations_pb2
 
+from cloud_io.object_store import get_object_store
 from utils.config import settings
 from utils.exceptions import DocumentProcessingError
 
 logger = logging.getLogger(__name__)
 
+_clients = {}
+_clients_lock = threading.Lock()
 
-def batch_process_pdf_gcs(gcs_input_uri: str) -> str:
-    """
-    Asynchronously process a PDF in GCS via Document AI OCR and write results to GCS.
-
-    Args:
-        gcs_input_uri (str): URI of the PDF in GCS, e.g. "gs://my-bucket/file.pdf".
-
-    Returns:
-        str: GCS prefix where output JSON was written.
-             e.g. "gs://my-bucket/output/file/"
 
-    Raises:
-        DocumentProcessingError: on any failure.
+def get_documentai_client(fake=settings.DOCUMENTAI_FAKE):
     """
-
-    # Build client and resource names
-    client = documentai.DocumentProcessorServiceClient(
-        client_options={"api_endpoint": "eu-documentai.googleapis.com"}
-    )
+    One Document AI client per process (see get_storage_client), or the offline
+    FakeDocumentProcessorServiceClient when DOCUMENTAI_FAKE is set.
+    """
+    pid = os.getpid()
+    client = _clients.get(pid)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(pid)
+            if client is None:
+                if fake:
+                    from cloud_io.fake_documentai import (
+                        FakeDocumentProcessorServiceClient,
+                    )
+
+                    client = FakeDocumentProcessorServiceClient()
+                else:
+                    client = documentai.DocumentProcessorServiceClient(
+                        client_options={"api_endpoint": "eu-documentai.googleapis.com"}
+                    )
+                _clients[pid] = client
+    return client
+
+
+def submit_ocr_batch(input_uris, output_prefix=settings.OCR_OUTPUT_PREFIX) -> str:
+    """
+    Submit one Document AI batch operation OCR'ing every PDF in `input_uris`
+    and return its operation name without waiting; see get_ocr_operation.
+    Output for input i lands under <output_prefix>/<operation id>/<i>/.
+    """
+    client = get_documentai_client()
     name = client.processor_path(
         settings.GCP_PROJECT_ID,
         settings.GCP_DOC_LOCATION,
         settings.GCP_DOC_PROCESSOR_ID,
     )
-
-    # Configure input from GCS
-    gcs_doc = documentai.GcsDocument(gcs_uri=gcs_input_uri, mime_type="application/pdf")
-    gcs_docs = documentai.GcsDocuments(documents=[gcs_doc])
-    input_config = documentai.BatchDocumentsInputConfig(gcs_documents=gcs_docs)
-
-    # Configure output to GCS under a per-file prefix
-    bucket = settings.GCS_BUCKET_NAME
-    filename = os.path.basename(gcs_input_uri)
-    output_prefix = f"output/{filename}/"
-    gcs_output_config = documentai.DocumentOutputConfig.GcsOutputConfig(
-        gcs_uri=f"gs://{bucket}/{output_prefix}"
-    )
-    output_config = documentai.DocumentOutputConfig(gcs_output_config=gcs_output_config)
-
-    # Build the batch request
+    documents = [
+        documentai.GcsDocument(gcs_uri=uri, mime_type="application/pdf")
+        for uri in input_uris
+    ]
     request = documentai.BatchProcessRequest(
         name=name,
-        input_documents=input_config,
-        document_output_config=output_config,
+        input_documents=documentai.BatchDocumentsInputConfig(
+            gcs_documents=documentai.GcsDocuments(documents=documents)
+        ),
+        document_output_config=documentai.DocumentOutputConfig(
+            gcs_output_config=documentai.DocumentOutputConfig.GcsOutputConfig(
+                gcs_uri=get_object_store().uri(output_prefix)
+            )
+        ),
     )
-
     try:
-        # Kick off the batch operation
         operation = client.batch_process_documents(request=request)
-        logger.info(f"Started batch OCR for {gcs_input_uri}, waiting for completion...")
-        operation.result(timeout=300)  # wait up to 5 minutes
-
-        logger.info(f"Batch OCR completed for {gcs_input_uri}")
-        return output_prefix  # f"gs://{bucket}/{output_prefix}"
-
     except Exception as err:
-        logger.exception(f"Batch OCR failed for {gcs_input_uri}")
-        raise DocumentProcessingError(f"Batch OCR failed for {gcs_input_uri}") from err
+        logger.exception(f"Batch OCR submission failed for {len(input_uris)} PDF(s)")
+        raise DocumentProcessingError("Batch OCR submission failed") from err
+    logger.info(
+        f"Submitted batch OCR for {len(input_uris)} PDF(s): {operation.operation.name}"
+    )
+    return operation.operation.name
 
 
-def move_gcs_blob_to_processed(gcs_uri: str) -> None:
+def get_ocr_operation(operation_name: str):
     """
-    Move a blob in GCS into a 'processed/' subfolder.
+    Poll a batch OCR operation once.
 
-    Args:
-        gcs_uri (str): Full GCS URI, e.g. 'gs://bucket-name/file.pdf'.
+    Returns {"done", "error", "documents"}, where "documents" maps each input
+    URI to {"ok", "error", "output"} ("output" being the object store prefix
+    of its OCR JSON) once the operation has finished.
     """
-
-    try:
-        client = storage.Client()
-        path = gcs_uri.replace("gs://", "")
-        bucket_name, blob_name = path.split("/", 1)
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
-
-        new_name = f"processed/{os.path.basename(blob_name)}"
-        bucket.rename_blob(blob, new_name)
-        logger.info(f"Moved {gcs_uri} to gs://{bucket_name}/{new_name}")
-
-    except Exception as err:
-        logger.exception(f"Failed to move {gcs_uri} to processed/")
-        raise DocumentProcessingError(
-            f"Failed to move {gcs_uri} to processed/"
-        ) from err
+    operation = get_documentai_client().get_operation(
+        request=operations_pb2.GetOperationRequest(name=operation_name)
+    )
+    result = {"done": operation.done, "error": None, "documents": {}}
+    if not operation.done:
+        return result
+    if operation.HasField("error"):
+        result["error"] = operation.error.message or f"code {operation.error.code}"
+    if operation.metadata.value:
+        metadata = documentai.BatchProcessMetadata.deserialize(operation.metadata.value)
+        store = get_object_store()
+        for status in metadata.individual_process_statuses:
+            ok = status.status.code == 0 and bool(status.output_gcs_destination)
+            result["documents"][status.input_gcs_source] = {
+                "ok": ok,
+                "error": None if ok else status.status.message or result["error"],
+                "output": (
+                    store.name(status.output_gcs_destination).rstrip("/") + "/"
+                    if ok
+                    else None
+                ),
+            }
+    return result
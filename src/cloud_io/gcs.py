@@ -1,47 +1,127 @@
 import json
 import os
-from datetime import timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 
 from google.cloud import storage
+from requests.adapters import HTTPAdapter
 
 from utils.config import settings
 
+# Calls per GCS JSON API batch request
+BATCH_LIMIT = 100
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_storage_client(pool_size=settings.GCS_POOL_SIZE):
+    """
+    One storage.Client per process, built on first use. Keyed by process id so
+    forked workers never share the parent's HTTP connections. The connection
+    pool holds `pool_size` connections so parallel batch operations reuse them
+    instead of opening new ones.
+    """
+    pid = os.getpid()
+    client = _clients.get(pid)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(pid)
+            if client is None:
+                client = storage.Client()
+                adapter = HTTPAdapter(
+                    pool_connections=pool_size, pool_maxsize=pool_size
+                )
+                client._http.mount("https://", adapter)
+                _clients[pid] = client
+    return client
+
+
+def _bucket(bucket_name=None):
+    return get_storage_client().bucket(bucket_name or settings.GCS_BUCKET_NAME)
+
 
 def list_gcs_json_files_recursively(prefix: str):
     """
     Recursively list all JSON files under a GCS prefix (including nested folders).
     """
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
-    blobs = bucket.list_blobs(prefix=prefix)
-    return [blob.name for blob in blobs if blob.name.endswith(".json")]
+    return list_gcs_files_with_prefix(prefix, suffix=".json")
 
 
 def download_json_from_gcs(blob_name: str):
     """Download and parse a JSON file from GCS."""
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
-    blob = bucket.blob(blob_name)
-    data = blob.download_as_bytes()
+    data = _bucket().blob(blob_name).download_as_bytes()
     return json.loads(data)
 
 
+def download_gcs_blobs(blob_names, concurrency=settings.GCS_IO_CONCURRENCY):
+    """
+    Download many blobs in parallel; returns their bytes in input order.
+    """
+    bucket = _bucket()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(
+            pool.map(lambda name: bucket.blob(name).download_as_bytes(), blob_names)
+        )
+
+
+def open_gcs_blob(blob_name: str, chunk_size: int = 8 * 1024 * 1024):
+    """
+    Open a blob for streaming binary reads, `chunk_size` bytes per request.
+    """
+    return _bucket().blob(blob_name).open("rb", chunk_size=chunk_size)
+
+
+def upload_gcs_blob(blob_name: str, data: bytes):
+    """Write bytes to a blob in the default bucket."""
+    _bucket().blob(blob_name).upload_from_string(data)
+
+
 def move_gcs_blob(source_uri: str, target_prefix: str):
     """
     Move a file in GCS from its current location to target_prefix (folder).
     """
-    storage_client = storage.Client()
-    bucket_name = source_uri.split("/")[2]
-    blob_name = "/".join(source_uri.split("/")[3:])
-    bucket = storage_client.bucket(bucket_name)
-    source_blob = bucket.blob(blob_name)
+    return move_gcs_blobs([source_uri], target_prefix)[0]
 
-    filename = os.path.basename(blob_name)
-    target_blob_name = os.path.join(target_prefix, filename)
-    bucket.copy_blob(source_blob, bucket, target_blob_name)
-    source_blob.delete()
 
-    return f"gs://{bucket_name}/{target_blob_name}"
+def move_gcs_blobs(source_uris, target_prefix: str):
+    """
+    Move many gs:// objects into target_prefix (folder); returns the new URIs.
+
+    Objects are copied, then deleted, each step sent as batch requests of up to
+    BATCH_LIMIT calls, so N moves cost two round trips per BATCH_LIMIT objects
+    instead of two per object. Sources are only deleted once every copy in
+    their batch succeeded.
+    """
+    client = get_storage_client()
+    targets = []
+    for start in range(0, len(source_uris), BATCH_LIMIT):
+        group = [parse_gcs_uri(uri) for uri in source_uris[start : start + BATCH_LIMIT]]
+        with client.batch():
+            for bucket_name, blob_name in group:
+                bucket = client.bucket(bucket_name)
+                target = os.path.join(target_prefix, os.path.basename(blob_name))
+                bucket.copy_blob(bucket.blob(blob_name), bucket, target)
+                targets.append(f"gs://{bucket_name}/{target}")
+        with client.batch():
+            for bucket_name, blob_name in group:
+                client.bucket(bucket_name).blob(blob_name).delete()
+    return targets
+
+
+def delete_gcs_blobs(blob_names, bucket_name=None):
+    """
+    Delete many blobs from the bucket, BATCH_LIMIT calls per batch request.
+    """
+    client = get_storage_client()
+    bucket = client.bucket(bucket_name or settings.GCS_BUCKET_NAME)
+    for start in range(0, len(blob_names), BATCH_LIMIT):
+        with client.batch():
+            for blob_name in blob_names[start : start + BATCH_LIMIT]:
+                bucket.blob(blob_name).delete()
 
 
 def get_output_prefix_for_pdf(blob_name: str):
@@ -57,28 +137,79 @@ def list_gcs_files_with_prefix(prefix: str, suffix=None):
     """
     List files in a bucket with a given prefix and optional suffix.
     """
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(settings.GCS_BUCKET_NAME)
-    blobs = bucket.list_blobs(prefix=prefix)
+    blobs = get_storage_client().list_blobs(
+        settings.GCS_BUCKET_NAME, prefix=prefix, fields="items(name),nextPageToken"
+    )
     return [blob.name for blob in blobs if (not suffix or blob.name.endswith(suffix))]
 
 
-def generate_gcs_signed_url(gs_path: str, expiration_seconds=600):
+def list_gcs_objects(prefix: str, suffix=None, recursive=True):
+    """
+    Like list_gcs_files_with_prefix, with each blob's generation and update time:
+    {"name", "generation", "updated"} dicts. Without `recursive`, only blobs
+    directly under `prefix` are listed (sub-folders are not walked).
+    """
+    blobs = get_storage_client().list_blobs(
+        settings.GCS_BUCKET_NAME,
+        prefix=prefix,
+        delimiter=None if recursive else "/",
+        fields="items(name,generation,updated),nextPageToken",
+    )
+    return [
+        {"name": blob.name, "generation": blob.generation, "updated": blob.updated}
+        for blob in blobs
+        if not suffix or blob.name.endswith(suffix)
+    ]
+
+
+def list_gcs_files_many(prefixes, suffix=None, concurrency=settings.GCS_IO_CONCURRENCY):
+    """
+    List several prefixes in parallel; returns one name list per prefix.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(
+            pool.map(
+                lambda prefix: list_gcs_files_with_prefix(prefix, suffix), prefixes
+            )
+        )
+
+
+def parse_gcs_uri(gs_path: str):
     """
-    Given a gs:// URI, return a signed HTTP(s) URL valid for `expiration_seconds`.
+    Split a gs://bucket/blob URI into (bucket_name, blob_name).
     """
     if not gs_path.startswith("gs://"):
         raise ValueError("Input must start with gs://")
     parts = gs_path[5:].split("/", 1)
     if len(parts) != 2:
         raise ValueError("Invalid GCS URI")
-    bucket_name, blob_name = parts
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    url = blob.generate_signed_url(
+    return parts[0], parts[1]
+
+
+@lru_cache(maxsize=settings.SIGNED_URL_CACHE_SIZE)
+def _signed_url(gs_path: str, expires_at: int):
+    bucket_name, blob_name = parse_gcs_uri(gs_path)
+    blob = get_storage_client().bucket(bucket_name).blob(blob_name)
+    return blob.generate_signed_url(
         version="v4",
-        expiration=timedelta(seconds=expiration_seconds),
+        expiration=datetime.fromtimestamp(expires_at, tz=timezone.utc),
         method="GET",
     )
-    return url
+
+
+def generate_gcs_signed_url(
+    gs_path: str,
+    expiration_seconds=600,
+    bucket_seconds=settings.SIGNED_URL_BUCKET_SECONDS,
+):
+    """
+    Given a gs:// URI, return a signed HTTP(s) URL valid for at least
+    `expiration_seconds`.
+
+    Time is split into buckets of `bucket_seconds`; every request for a blob in
+    the same bucket gets the same URL, signed once to expire
+    `expiration_seconds` after the bucket ends, so cached URLs never have
+    less validity left than asked for.
+    """
+    bucket_end = (int(time.time()) // bucket_seconds + 1) * bucket_seconds
+    return _signed_url(gs_path, bucket_end + expiration_seconds)
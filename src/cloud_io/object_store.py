@@ -0,0 +1,180 @@
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cloud_io.gcs import (
+    delete_gcs_blobs,
+    download_gcs_blobs,
+    list_gcs_files_many,
+    list_gcs_files_with_prefix,
+    list_gcs_objects,
+    move_gcs_blobs,
+    open_gcs_blob,
+    parse_gcs_uri,
+    upload_gcs_blob,
+)
+from utils.config import settings
+
+
+class GCSObjectStore:
+    """
+    Ingestion I/O against the GCS bucket, through the shared storage client.
+    Objects are addressed by blob name; `uri` gives the gs:// form stored in
+    chunk payloads and passed to Document AI. `list_info` adds each object's
+    generation, update time and URI.
+    """
+
+    def __init__(
+        self,
+        bucket_name=settings.GCS_BUCKET_NAME,
+        concurrency=settings.GCS_IO_CONCURRENCY,
+    ):
+        self.bucket_name = bucket_name
+        self.concurrency = concurrency
+
+    def uri(self, name):
+        return f"gs://{self.bucket_name}/{name}"
+
+    def name(self, uri):
+        return parse_gcs_uri(uri)[1]
+
+    def list(self, prefix, suffix=None):
+        return list_gcs_files_with_prefix(prefix, suffix)
+
+    def list_info(self, prefix, suffix=None, recursive=True):
+        return [
+            {**obj, "uri": self.uri(obj["name"])}
+            for obj in list_gcs_objects(prefix, suffix, recursive)
+        ]
+
+    def list_many(self, prefixes, suffix=None):
+        return list_gcs_files_many(prefixes, suffix, self.concurrency)
+
+    def read_many(self, names):
+        return download_gcs_blobs(names, self.concurrency)
+
+    def read(self, name):
+        return self.read_many([name])[0]
+
+    def read_json(self, name):
+        return json.loads(self.read(name))
+
+    def open(self, name, chunk_size=8 * 1024 * 1024):
+        return open_gcs_blob(name, chunk_size)
+
+    def write(self, name, data):
+        upload_gcs_blob(name, data)
+
+    def move_many(self, uris, target_prefix):
+        return move_gcs_blobs(uris, target_prefix)
+
+    def move(self, uri, target_prefix):
+        return self.move_many([uri], target_prefix)[0]
+
+    def delete_many(self, names):
+        delete_gcs_blobs(names, self.bucket_name)
+
+
+class LocalObjectStore:
+    """
+    Same interface over a local directory, one file per object, so ingestion
+    I/O can run and be benchmarked without the cloud. URIs are file:// paths.
+    """
+
+    def __init__(
+        self, root=settings.OBJECT_STORE_ROOT, concurrency=settings.GCS_IO_CONCURRENCY
+    ):
+        self.root = Path(root).resolve()
+        self.concurrency = concurrency
+
+    def _path(self, name):
+        return self.root / name
+
+    def name(self, uri):
+        return Path(uri.removeprefix("file://")).relative_to(self.root).as_posix()
+
+    def uri(self, name):
+        return self._path(name).as_uri()
+
+    def list(self, prefix, suffix=None):
+        names = (
+            path.relative_to(self.root).as_posix()
+            for path in self.root.rglob("*")
+            if path.is_file()
+        )
+        return sorted(
+            name
+            for name in names
+            if name.startswith(prefix) and (not suffix or name.endswith(suffix))
+        )
+
+    def list_info(self, prefix, suffix=None, recursive=True):
+        """
+        The file's mtime stands in for the blob generation and update time.
+        """
+        info = []
+        for name in self.list(prefix, suffix):
+            if not recursive and "/" in name[len(prefix) :]:
+                continue
+            stat = self._path(name).stat()
+            info.append(
+                {
+                    "name": name,
+                    "generation": stat.st_mtime_ns,
+                    "updated": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                    "uri": self.uri(name),
+                }
+            )
+        return info
+
+    def list_many(self, prefixes, suffix=None):
+        return [self.list(prefix, suffix) for prefix in prefixes]
+
+    def read_many(self, names):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(lambda name: self._path(name).read_bytes(), names))
+
+    def read(self, name):
+        return self._path(name).read_bytes()
+
+    def read_json(self, name):
+        return json.loads(self.read(name))
+
+    def open(self, name, chunk_size=8 * 1024 * 1024):
+        return open(self._path(name), "rb", buffering=chunk_size)
+
+    def write(self, name, data):
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def move_many(self, uris, target_prefix):
+        targets = []
+        for uri in uris:
+            name = self.name(uri)
+            target = os.path.join(target_prefix, os.path.basename(name))
+            self._path(target).parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(self._path(name), self._path(target))
+            targets.append(self.uri(target))
+        return targets
+
+    def move(self, uri, target_prefix):
+        return self.move_many([uri], target_prefix)[0]
+
+    def delete_many(self, names):
+        for name in names:
+            self._path(name).unlink(missing_ok=True)
+
+
+def get_object_store(backend=settings.OBJECT_STORE):
+    """
+    Object store selected by OBJECT_STORE: "gcs" (default) or "local".
+    """
+    if backend == "local":
+        return LocalObjectStore()
+    if backend == "gcs":
+        return GCSObjectStore()
+    raise ValueError(f"Unknown OBJECT_STORE {backend!r}")
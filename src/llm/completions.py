@@ -1,7 +1,11 @@
-from openai import OpenAI
+from functools import lru_cache
+
+from openai import AsyncOpenAI, OpenAI
 
 from utils.config import settings
 
+SYSTEM_PROMPT = "You are a technical assistant. Use ONLY the provided context to answer the user's question and cite sources."
+
 
 def ask_llm_lambda_stream(prompt, model=settings.LAMBDA_API_MODEL):
     api_key = settings.LAMBDA_API_KEY
@@ -13,7 +17,7 @@ def ask_llm_lambda_stream(prompt, model=settings.LAMBDA_API_MODEL):
         messages=[
             {
                 "role": "system",
-                "content": "You are a technical assistant. Use ONLY the provided context to answer the user's question and cite sources.",
+                "content": SYSTEM_PROMPT,
             },
             {"role": "user", "content": prompt},
         ],
@@ -25,3 +29,41 @@ def ask_llm_lambda_stream(prompt, model=settings.LAMBDA_API_MODEL):
         content = chunk.choices[0].delta.content
         if content:
             yield content
+
+
+@lru_cache(maxsize=1)
+def get_async_llm_client():
+    """
+    One AsyncOpenAI client per process, so streams share its connection pool.
+    """
+    return AsyncOpenAI(
+        api_key=settings.LAMBDA_API_KEY, base_url=settings.LAMBDA_API_BASE
+    )
+
+
+async def ask_llm_lambda_stream_async(
+    prompt, model=settings.LAMBDA_API_MODEL, usage=None
+):
+    """
+    Async ask_llm_lambda_stream: yields answer text as it is generated without
+    blocking the event loop. If a `usage` dict is given, it is filled with the
+    token counts the API reports at the end of the stream.
+    """
+    stream = await get_async_llm_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=512,
+        temperature=0.2,
+        stream=True,
+        stream_options={"include_usage": usage is not None},
+    )
+    async for chunk in stream:
+        if chunk.usage is not None and usage is not None:
+            usage.update(chunk.usage.model_dump(exclude_none=True))
+        # The usage chunk has no choices
+        content = chunk.choices[0].delta.content if chunk.choices else None
+        if content:
+            yield content
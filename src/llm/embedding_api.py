@@ -1,12 +1,25 @@
 import logging
 import os
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastembed import TextEmbedding
+from fastapi.responses import JSONResponse, Response
+from fastembed import SparseTextEmbedding, TextEmbedding
+from fastembed.rerank.cross_encoder import TextCrossEncoder
 from pydantic import BaseModel, conlist
 
+from llm.embedding_cache import build_embedding_cache
+from llm.inference_pool import InferencePool
+from llm.micro_batcher import MicroBatcher
+from llm.reranker import Reranker
+from llm.wire_format import (
+    DIM_HEADER,
+    JSON_MEDIA_TYPE,
+    MODEL_HEADER,
+    encode_vectors,
+    negotiate,
+)
 from utils.config import settings
 
 # Logging config
@@ -20,20 +33,104 @@ MODEL_NAME = settings.EMBEDDING_MODEL
 BATCH_LIMIT = int(settings.EMBED_BATCH_LIMIT)
 
 
-try:
-    _cached_model = TextEmbedding(
+def _load_model():
+    return TextEmbedding(
         model_name=MODEL_NAME,
         cache_dir="/app/nlp",
         local_dir="/app/nlp",
         local_files_only=True,
         max_workers=1,
+        # fastembed applies this to both intra- and inter-op threads
+        threads=settings.EMBED_SESSION_THREADS or None,
     )
 
-    logger.info(f"Loaded model: {MODEL_NAME}")
+
+try:
+    _pool = InferencePool(_load_model, size=settings.EMBED_SESSIONS)
+
+    logger.info(
+        f"Loaded model: {MODEL_NAME} "
+        f"({_pool.size} session(s), threads={settings.EMBED_SESSION_THREADS or 'auto'})"
+    )
 except Exception as e:
     logger.error(f"Failed to load embedding model '{MODEL_NAME}': {e}")
     raise
 
+# Optional sparse (e.g. BM25) model for hybrid retrieval
+SPARSE_MODEL_NAME = settings.SPARSE_MODEL
+_sparse_model = None
+if SPARSE_MODEL_NAME:
+    _sparse_model = SparseTextEmbedding(
+        model_name=SPARSE_MODEL_NAME,
+        cache_dir="/app/nlp",
+        local_files_only=True,
+    )
+    logger.info(f"Loaded sparse model: {SPARSE_MODEL_NAME}")
+
+# Optional cross-encoder for reranking retrieved chunks
+RERANK_MODEL_NAME = settings.RERANK_MODEL
+RERANK_LIMIT = settings.RERANK_MAX_DOCUMENTS
+_reranker = None
+if RERANK_MODEL_NAME:
+    if settings.RERANK_CANDIDATES > RERANK_LIMIT:
+        raise ValueError(
+            f"RERANK_CANDIDATES ({settings.RERANK_CANDIDATES}) exceeds "
+            f"RERANK_MAX_DOCUMENTS ({RERANK_LIMIT})"
+        )
+    _reranker = Reranker(
+        TextCrossEncoder(
+            model_name=RERANK_MODEL_NAME,
+            cache_dir="/app/nlp",
+            local_files_only=True,
+            threads=settings.EMBED_SESSION_THREADS or None,
+        ),
+        RERANK_MODEL_NAME,
+        batch_size=settings.RERANK_BATCH_SIZE,
+        cache_entries=settings.RERANK_CACHE_ENTRIES,
+        max_concurrent=settings.RERANK_MAX_CONCURRENT,
+    )
+    logger.info(f"Loaded rerank model: {RERANK_MODEL_NAME}")
+
+_cache = build_embedding_cache(
+    MODEL_NAME,
+    max_bytes=settings.EMBED_CACHE_MAX_MB * 1024 * 1024,
+    backend=settings.EMBED_CACHE_BACKEND,
+    path=settings.EMBED_CACHE_PATH,
+    redis_url=settings.EMBED_CACHE_REDIS_URL,
+    ttl_seconds=settings.EMBED_CACHE_TTL,
+)
+
+
+def _embed_with_cache(texts):
+    """
+    Embed texts, serving cached ones without inference and computing each
+    distinct uncached text once, in a single model batch.
+    """
+    vectors = _cache.get_many(texts)
+    missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+    if missing:
+        computed = dict(zip(missing, _pool.embed(missing)))
+        _cache.set_many(missing, computed.values())
+        vectors = [
+            computed[text] if vector is None else vector
+            for text, vector in zip(texts, vectors)
+        ]
+    logger.info(
+        "Embedded %d texts, %d cached (model=%s)",
+        len(missing),
+        len(texts) - len(missing),
+        MODEL_NAME,
+    )
+    return vectors
+
+
+_batcher = MicroBatcher(
+    _embed_with_cache,
+    max_batch_size=settings.EMBED_MAX_BATCH or BATCH_LIMIT,
+    max_wait_ms=settings.EMBED_MAX_WAIT_MS,
+    max_in_flight=_pool.size,
+)
+
 # FastAPI setup
 app = FastAPI(title="Qdrant FastEmbed Service", version="1.1")
 
@@ -55,15 +152,64 @@ class EmbedResponse(BaseModel):
     embeddings: list[list[float]]
 
 
+class SparseEmbedRequest(EmbedRequest):
+    # Queries and documents are weighted differently (e.g. BM25 term frequency)
+    query: bool = False
+
+
+class RerankRequest(BaseModel):
+    query: str
+    documents: conlist(str, min_length=1, max_length=RERANK_LIMIT)
+    max_latency_ms: float = settings.RERANK_MAX_LATENCY_MS
+
+
+class RerankResponse(BaseModel):
+    model: str
+    # None for documents left unscored by the latency cap or load shedding
+    scores: list[float | None]
+    shed: bool
+
+
+class SparseVectorOut(BaseModel):
+    indices: list[int]
+    values: list[float]
+
+
+class SparseEmbedResponse(BaseModel):
+    model: str
+    embeddings: list[SparseVectorOut]
+
+
 @app.get("/health")
 def health():
     return {"status": "ok", "model": MODEL_NAME}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    return _cache.stats()
+
+
+@app.get("/rerank/stats")
+def rerank_stats():
+    if _reranker is None:
+        raise HTTPException(status_code=404, detail="No rerank model configured.")
+    return _reranker.stats()
+
+
+@app.get("/batcher/stats")
+def batcher_stats():
+    return _batcher.stats()
+
+
 @app.post("/embed", response_model=EmbedResponse)
-def embed_texts(request: EmbedRequest):
+async def embed_texts(request: EmbedRequest, accept: str | None = Header(None)):
     """
     Batch embed up to BATCH_LIMIT texts.
+    Concurrent requests are merged into one model call by the micro-batcher.
+
+    Clients that accept a binary media type from llm.wire_format get raw
+    little-endian float32/float16 vectors instead of JSON.
     """
     texts = request.texts
     if not texts or len(texts) > BATCH_LIMIT:
@@ -73,14 +219,69 @@ def embed_texts(request: EmbedRequest):
         )
 
     try:
-        vectors = list(_cached_model.embed(texts))
-        logger.info("Embedded %d texts (model=%s)", len(texts), MODEL_NAME)
-        return {"model": MODEL_NAME, "embeddings": vectors}
+        if settings.EMBED_MICRO_BATCHING:
+            vectors = await _batcher.submit(texts)
+        else:
+            vectors = await run_in_threadpool(_embed_with_cache, texts)
+        media_type = negotiate(accept)
+        if media_type != JSON_MEDIA_TYPE:
+            return Response(
+                content=encode_vectors(vectors, media_type),
+                media_type=media_type,
+                headers={DIM_HEADER: str(len(vectors[0])), MODEL_HEADER: MODEL_NAME},
+            )
+        return {"model": MODEL_NAME, "embeddings": [v.tolist() for v in vectors]}
     except Exception as e:
         logger.exception("Embedding error")
         raise HTTPException(status_code=500, detail=f"Embedding error: {e}")
 
 
+def _embed_sparse(texts, query):
+    if query:
+        embeddings = _sparse_model.query_embed(texts)
+    else:
+        embeddings = _sparse_model.embed(texts, batch_size=BATCH_LIMIT)
+    return [
+        {"indices": e.indices.tolist(), "values": e.values.tolist()} for e in embeddings
+    ]
+
+
+@app.post("/embed_sparse", response_model=SparseEmbedResponse)
+async def embed_texts_sparse(request: SparseEmbedRequest):
+    """
+    Sparse vectors (indices/values) for up to BATCH_LIMIT texts, for the
+    keyword side of hybrid search. Set `query` for search queries.
+    """
+    if _sparse_model is None:
+        raise HTTPException(status_code=404, detail="No sparse model configured.")
+    try:
+        embeddings = await run_in_threadpool(
+            _embed_sparse, request.texts, request.query
+        )
+        return {"model": SPARSE_MODEL_NAME, "embeddings": embeddings}
+    except Exception as e:
+        logger.exception("Sparse embedding error")
+        raise HTTPException(status_code=500, detail=f"Sparse embedding error: {e}")
+
+
+@app.post("/rerank", response_model=RerankResponse)
+async def rerank(request: RerankRequest):
+    """
+    Cross-encoder relevance scores of `documents` for `query`, in input order.
+    Scoring stops at `max_latency_ms` (see llm.reranker.Reranker).
+    """
+    if _reranker is None:
+        raise HTTPException(status_code=404, detail="No rerank model configured.")
+    try:
+        scores, shed = await run_in_threadpool(
+            _reranker.score, request.query, request.documents, request.max_latency_ms
+        )
+        return {"model": RERANK_MODEL_NAME, "scores": scores, "shed": shed}
+    except Exception as e:
+        logger.exception("Rerank error")
+        raise HTTPException(status_code=500, detail=f"Rerank error: {e}")
+
+
 @app.exception_handler(Exception)
 def generic_exception_handler(request: Request, exc: Exception):
     logger.error("Unhandled error: %s", exc)
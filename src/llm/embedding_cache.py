@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger("embedding_api")
+
+
+def make_cache_key(model_name: str, text: str) -> str:
+    """
+    Cache key for one text under one model. The model name is part of the hash,
+    so switching EMBEDDING_MODEL can never hit vectors from another model.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SqliteVectorStore:
+    """
+    Persistent vector store in a local SQLite file.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                part = keys[start : start + 500]
+                placeholders = ",".join("?" * len(part))
+                query = (
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})"
+                )
+                rows = self._conn.execute(query, part).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def set_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+
+class RedisVectorStore:
+    """
+    Persistent vector store in Redis, shared by every embedding replica.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int | None = None, prefix="emb:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._ttl = ttl_seconds
+        self._prefix = prefix
+
+    def get_many(self, keys):
+        values = self._redis.mget([self._prefix + key for key in keys])
+        return {
+            key: np.frombuffer(blob, dtype=np.float32)
+            for key, blob in zip(keys, values)
+            if blob is not None
+        }
+
+    def set_many(self, items):
+        pipe = self._redis.pipeline(transaction=False)
+        for key, vector in items.items():
+            pipe.set(self._prefix + key, vector.tobytes(), ex=self._ttl)
+        pipe.execute()
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache: an in-memory LRU bounded by bytes, in front of
+    an optional persistent store (SQLite file or Redis).
+    """
+
+    def __init__(self, model_name: str, max_bytes: int, store=None):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.store = store
+        self._lru = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, vector):
+        # Caller holds the lock
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return
+        self._lru[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes and self._lru:
+            _, evicted = self._lru.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def get_many(self, texts):
+        """
+        Look up texts; returns a list aligned with `texts`, None for misses.
+        """
+        keys = [make_cache_key(self.model_name, text) for text in texts]
+        vectors = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    vectors[i] = vector
+                    self.memory_hits += 1
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.store is not None:
+            try:
+                found = self.store.get_many(list({keys[i] for i in missing}))
+            except Exception as e:
+                logger.warning("Embedding cache store read failed: %s", e)
+                found = {}
+            with self._lock:
+                for i in missing:
+                    vector = found.get(keys[i])
+                    if vector is not None:
+                        vectors[i] = vector
+                        self._remember(keys[i], vector)
+                        self.store_hits += 1
+
+        with self._lock:
+            self.misses += sum(1 for vector in vectors if vector is None)
+        return vectors
+
+    def set_many(self, texts, vectors):
+        """
+        Cache freshly computed vectors for `texts`.
+        """
+        items = {
+            make_cache_key(self.model_name, text): np.asarray(vector, np.float32)
+            for text, vector in zip(texts, vectors)
+        }
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+        if self.store is not None:
+            try:
+                self.store.set_many(items)
+            except Exception as e:
+                logger.warning("Embedding cache store write failed: %s", e)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.store_hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._lru),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    (self.memory_hits + self.store_hits) / lookups if lookups else 0.0
+                ),
+                "store": type(self.store).__name__ if self.store else None,
+            }
+
+
+def build_embedding_cache(
+    model_name: str,
+    max_bytes: int,
+    backend: str = "",
+    path: str | None = None,
+    redis_url: str | None = None,
+    ttl_seconds: int | None = None,
+):
+    """
+    Build the cache from settings. `backend` is "", "disk" or "redis".
+    """
+    store = None
+    if backend == "disk":
+        store = SqliteVectorStore(path)
+    elif backend == "redis":
+        store = RedisVectorStore(redis_url, ttl_seconds=ttl_seconds)
+    elif backend:
+        raise ValueError(f"Unknown embedding cache backend: {backend}")
+    return EmbeddingCache(model_name, max_bytes, store=store)
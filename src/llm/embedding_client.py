@@ -0,0 +1,316 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from llm.wire_format import DIM_HEADER, JSON_MEDIA_TYPE, WIRE_FORMATS, decode_vectors
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableEmbeddingError(Exception):
+    """A replica failed in a way worth retrying elsewhere (5xx, 429, timeout)."""
+
+
+def decode_embed_response(resp):
+    """
+    Embeddings from an /embed response (requests or httpx): an (n, dim)
+    float32 array for the binary formats, a list of float lists for JSON.
+    """
+    content_type = resp.headers.get("content-type", JSON_MEDIA_TYPE)
+    if content_type.startswith(JSON_MEDIA_TYPE):
+        return resp.json()["embeddings"]
+    return decode_vectors(resp.content, content_type, int(resp.headers[DIM_HEADER]))
+
+
+class EndpointPool:
+    """
+    Round-robin over embedding replicas with passive health checking.
+
+    A replica that fails `eject_after` times in a row is ejected for
+    `eject_seconds`, then gets traffic again; one success resets it. If every
+    replica is ejected, the one due back first is used anyway.
+    """
+
+    def __init__(self, endpoints, eject_after=3, eject_seconds=30.0):
+        if not endpoints:
+            raise ValueError("At least one embedding endpoint is required")
+        self.endpoints = list(endpoints)
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._failures = {endpoint: 0 for endpoint in self.endpoints}
+        self._ejected_until = {endpoint: 0.0 for endpoint in self.endpoints}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def pick(self):
+        with self._lock:
+            now = time.monotonic()
+            for _ in range(len(self.endpoints)):
+                endpoint = self.endpoints[self._next]
+                self._next = (self._next + 1) % len(self.endpoints)
+                if self._ejected_until[endpoint] <= now:
+                    return endpoint
+            return min(self.endpoints, key=self._ejected_until.__getitem__)
+
+    def report_success(self, endpoint):
+        with self._lock:
+            self._failures[endpoint] = 0
+            self._ejected_until[endpoint] = 0.0
+
+    def report_failure(self, endpoint):
+        with self._lock:
+            self._failures[endpoint] += 1
+            if self._failures[endpoint] >= self.eject_after:
+                self._ejected_until[endpoint] = time.monotonic() + self.eject_seconds
+                logger.warning(
+                    f"Ejecting embedding endpoint {endpoint} for {self.eject_seconds}s"
+                )
+
+    def status(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                endpoint: {
+                    "failures": self._failures[endpoint],
+                    "ejected": self._ejected_until[endpoint] > now,
+                }
+                for endpoint in self.endpoints
+            }
+
+
+class _ClientBase:
+    def __init__(
+        self,
+        endpoints,
+        wire_format=settings.EMBED_WIRE_FORMAT,
+        timeout=60.0,
+        retries=3,
+        backoff=0.2,
+        max_concurrency=4,
+        pool_size=16,
+    ):
+        self.pool = EndpointPool(endpoints)
+        self.accept = WIRE_FORMATS[wire_format]
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+
+    def _delay(self, attempt):
+        # Full jitter: uniform in [0, backoff * 2^attempt]
+        return random.uniform(0, self.backoff * 2**attempt)
+
+    @staticmethod
+    def _url(endpoint, route):
+        # Endpoints point at /embed; other routes live next to it
+        if route is None:
+            return endpoint
+        return f"{endpoint.rsplit('/', 1)[0]}/{route}"
+
+    @staticmethod
+    def _check(resp, endpoint):
+        if resp.status_code >= 500 or resp.status_code == 429:
+            raise RetryableEmbeddingError(
+                f"Embedding service {endpoint} returned {resp.status_code}: {resp.text}"
+            )
+
+
+class EmbeddingClient(_ClientBase):
+    """
+    Thread-safe embedding client with keep-alive connection pooling, retries
+    with jittered exponential backoff, and load balancing across replicas.
+    """
+
+    def __init__(self, endpoints, **kwargs):
+        super().__init__(endpoints, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(self.pool.endpoints), pool_maxsize=self.pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="embed-client"
+        )
+
+    def _post(self, payload, route=None, timeout=None, retries=None):
+        """
+        POST to one replica, retrying on another one when it fails.
+        """
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            endpoint = self.pool.pick()
+            try:
+                resp = self.session.post(
+                    self._url(endpoint, route),
+                    json=payload,
+                    headers={"Accept": self.accept},
+                    timeout=timeout or self.timeout,
+                )
+                self._check(resp, endpoint)
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                RetryableEmbeddingError,
+            ) as err:
+                self.pool.report_failure(endpoint)
+                if attempt == retries:
+                    raise
+                logger.warning(f"Embedding attempt {attempt + 1} failed: {err}")
+                time.sleep(self._delay(attempt))
+                continue
+            self.pool.report_success(endpoint)
+            resp.raise_for_status()
+            return resp
+
+    def embed(self, texts):
+        """
+        Embed one batch of texts.
+        """
+        return decode_embed_response(self._post({"texts": texts}))
+
+    def embed_sparse(self, texts, query=False):
+        """
+        Sparse vectors ({"indices", "values"} dicts) for one batch of texts.
+        """
+        resp = self._post({"texts": texts, "query": query}, route="embed_sparse")
+        return resp.json()["embeddings"]
+
+    def rerank(self, query, documents, max_latency_ms):
+        """
+        Cross-encoder scores for `documents` (None where the service ran out of
+        its latency budget). Not retried: a late rerank is a useless one.
+        """
+        resp = self._post(
+            {"query": query, "documents": documents, "max_latency_ms": max_latency_ms},
+            route="rerank",
+            timeout=max_latency_ms / 1000 + 1.0,
+            retries=0,
+        )
+        return resp.json()["scores"]
+
+    def embed_many(self, batches, sparse=False):
+        """
+        Embed several batches concurrently (at most max_concurrency in flight).
+        Returns one result per batch, in order.
+        """
+        embed = self.embed_sparse if sparse else self.embed
+        if len(batches) <= 1:
+            return [embed(batch) for batch in batches]
+        return list(self._executor.map(embed, batches))
+
+
+class AsyncEmbeddingClient(_ClientBase):
+    """
+    asyncio counterpart of EmbeddingClient, built on httpx.AsyncClient.
+    """
+
+    def __init__(self, endpoints, **kwargs):
+        super().__init__(endpoints, **kwargs)
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _post(self, payload, route=None, timeout=None, retries=None):
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            endpoint = self.pool.pick()
+            try:
+                resp = await self.client.post(
+                    self._url(endpoint, route),
+                    json=payload,
+                    headers={"Accept": self.accept},
+                    timeout=timeout or self.timeout,
+                )
+                self._check(resp, endpoint)
+            except (httpx.TransportError, RetryableEmbeddingError) as err:
+                self.pool.report_failure(endpoint)
+                if attempt == retries:
+                    raise
+                logger.warning(f"Embedding attempt {attempt + 1} failed: {err}")
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            self.pool.report_success(endpoint)
+            resp.raise_for_status()
+            return resp
+
+    async def embed(self, texts):
+        return decode_embed_response(await self._post({"texts": texts}))
+
+    async def embed_sparse(self, texts, query=False):
+        resp = await self._post({"texts": texts, "query": query}, route="embed_sparse")
+        return resp.json()["embeddings"]
+
+    async def rerank(self, query, documents, max_latency_ms):
+        resp = await self._post(
+            {"query": query, "documents": documents, "max_latency_ms": max_latency_ms},
+            route="rerank",
+            timeout=max_latency_ms / 1000 + 1.0,
+            retries=0,
+        )
+        return resp.json()["scores"]
+
+    async def embed_many(self, batches, sparse=False):
+        embed = self.embed_sparse if sparse else self.embed
+
+        async def limited(batch):
+            async with self._semaphore:
+                return await embed(batch)
+
+        return await asyncio.gather(*(limited(batch) for batch in batches))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def configured_endpoints():
+    if settings.EMBEDDING_API_ENDPOINTS:
+        endpoints = settings.EMBEDDING_API_ENDPOINTS.split(",")
+        return [endpoint.strip() for endpoint in endpoints if endpoint.strip()]
+    return [settings.EMBEDDING_API_ENDPOINT]
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_embedding_client(
+    endpoints=None, wire_format=settings.EMBED_WIRE_FORMAT, asynchronous=False
+):
+    """
+    Process-wide shared client for `endpoints` (default: the configured ones).
+
+    Clients are cached per process id so a forked Celery worker never reuses
+    its parent's sockets.
+    """
+    endpoints = tuple(endpoints or configured_endpoints())
+    key = (os.getpid(), endpoints, wire_format, asynchronous)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client_class = AsyncEmbeddingClient if asynchronous else EmbeddingClient
+            client = client_class(
+                endpoints,
+                wire_format=wire_format,
+                timeout=settings.EMBED_CLIENT_TIMEOUT,
+                retries=settings.EMBED_CLIENT_RETRIES,
+                max_concurrency=settings.EMBED_CLIENT_CONCURRENCY,
+                pool_size=settings.EMBED_CLIENT_POOL_SIZE,
+            )
+            _clients[key] = client
+        return client
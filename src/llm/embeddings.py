@@ -1,5 +1,6 @@
-import requests
+import numpy as np
 
+from llm.embedding_client import get_embedding_client
 from utils.config import settings
 
 
@@ -9,24 +10,146 @@ def batch(iterable, batch_size):
         yield iterable[i : i + batch_size]
 
 
-def embed_texts_batched(texts, endpoint=settings.EMBEDDING_API_ENDPOINT, batch_size=64):
-    all_embeddings = []
-    for text_batch in batch(texts, batch_size):
-        resp = requests.post(endpoint, json={"texts": text_batch}, timeout=60)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as err:
-            print(f"Embedding service error {resp.status_code}: {resp.text}")
-            raise
-        all_embeddings.extend(resp.json()["embeddings"])
-    return all_embeddings
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) when no exact count is known."""
+    return len(text) // 4 + 1
 
 
-def embed_texts_remote(texts, endpoint=settings.EMBEDDING_API_ENDPOINT):
+def plan_batches(token_counts, max_items, max_tokens):
+    """
+    Group text indices into batches of similar length.
+
+    Indices are sorted by token count, and a batch is closed when it reaches
+    `max_items` or when its padded size (longest text x number of texts, which
+    is what the ONNX model actually computes) would exceed `max_tokens`.
+    """
+    order = sorted(range(len(token_counts)), key=token_counts.__getitem__)
+    batches = []
+    current = []
+    for i in order:
+        # Sorted ascending, so this text sets the padded length of the batch
+        padded = token_counts[i] * (len(current) + 1)
+        if current and (len(current) >= max_items or padded > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_texts_batched(
+    texts,
+    endpoint=None,
+    batch_size=64,
+    token_counts=None,
+    max_batch_tokens=settings.EMBED_MAX_BATCH_TOKENS,
+    wire_format=settings.EMBED_WIRE_FORMAT,
+):
+    """
+    Embed any number of texts, returning embeddings in the order of `texts`.
+
+    Texts are grouped by length (see plan_batches) so short texts are not
+    padded to the longest one in the request. `token_counts` are used when
+    known (e.g. chunk["tokens"]), otherwise lengths are estimated.
+
+    Batches are sent concurrently through the shared client for `endpoint`
+    (default: the configured replicas). With a binary `wire_format` the
+    result is one (n, dim) float32 array.
+    """
+    if token_counts is None or None in token_counts:
+        token_counts = [estimate_tokens(text) for text in texts]
+
+    plan = plan_batches(token_counts, batch_size, max_batch_tokens)
+    client = get_embedding_client(endpoint and [endpoint], wire_format)
+    results = client.embed_many([[texts[i] for i in indices] for indices in plan])
+
+    all_embeddings = None
+    for indices, vectors in zip(plan, results):
+        if all_embeddings is None:
+            if isinstance(vectors, np.ndarray):
+                all_embeddings = np.empty((len(texts), vectors.shape[1]), np.float32)
+            else:
+                all_embeddings = [None] * len(texts)
+        if isinstance(all_embeddings, np.ndarray):
+            all_embeddings[indices] = vectors
+        else:
+            for i, embedding in zip(indices, vectors):
+                all_embeddings[i] = embedding
+    return [] if all_embeddings is None else all_embeddings
+
+
+def embed_texts_remote(
+    texts,
+    endpoint=None,
+    wire_format=settings.EMBED_WIRE_FORMAT,
+):
     """
     Calls the embedding_api to embed one or more texts.
-    Returns a list of embeddings.
+    Returns a list of embeddings (an array for binary wire formats).
+    """
+    return get_embedding_client(endpoint and [endpoint], wire_format).embed(texts)
+
+
+async def embed_texts_async(
+    texts,
+    endpoint=None,
+    wire_format=settings.EMBED_WIRE_FORMAT,
+):
+    """
+    Async embed_texts_remote, for callers running on an event loop.
+    """
+    client = get_embedding_client(endpoint and [endpoint], wire_format, True)
+    return await client.embed(texts)
+
+
+def embed_texts_sparse(
+    texts,
+    endpoint=None,
+    batch_size=64,
+    query=False,
+):
+    """
+    Sparse (e.g. BM25) vectors for any number of texts, in order, as
+    {"indices", "values"} dicts. Set `query` for search queries.
+    """
+    client = get_embedding_client(endpoint and [endpoint])
+    if query:
+        return client.embed_sparse(texts, query=True)
+    results = client.embed_many(list(batch(texts, batch_size)), sparse=True)
+    return [vector for vectors in results for vector in vectors]
+
+
+def rerank_texts(
+    query,
+    documents,
+    endpoint=None,
+    max_latency_ms=settings.RERANK_MAX_LATENCY_MS,
+):
+    """
+    Cross-encoder scores of `documents` for `query` from the embedding service;
+    None for documents it did not get to within `max_latency_ms`.
+    """
+    client = get_embedding_client(endpoint and [endpoint])
+    return client.rerank(query, documents, max_latency_ms)
+
+
+async def embed_texts_sparse_async(texts, endpoint=None, query=True):
+    """
+    Async embed_texts_sparse for a handful of texts (e.g. one search query).
+    """
+    client = get_embedding_client(endpoint and [endpoint], asynchronous=True)
+    return await client.embed_sparse(texts, query=query)
+
+
+async def rerank_texts_async(
+    query,
+    documents,
+    endpoint=None,
+    max_latency_ms=settings.RERANK_MAX_LATENCY_MS,
+):
+    """
+    Async rerank_texts.
     """
-    resp = requests.post(endpoint, json={"texts": texts}, timeout=60)
-    resp.raise_for_status()
-    return resp.json()["embeddings"]
+    client = get_embedding_client(endpoint and [endpoint], asynchronous=True)
+    return await client.rerank(query, documents, max_latency_ms)
@@ -0,0 +1,53 @@
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("embedding_api")
+
+
+class InferencePool:
+    """
+    A fixed set of independent model sessions used in parallel.
+
+    ONNX Runtime releases the GIL during inference, so sessions driven from
+    separate threads run on separate cores. Each session is checked out for
+    one shard at a time; large batches are split into shards across the pool
+    and the results are concatenated in input order.
+
+    Every session holds its own copy of the model weights.
+    """
+
+    def __init__(self, load_model, size=1, min_shard_size=8):
+        self.size = max(1, size)
+        self.min_shard_size = min_shard_size
+        self._sessions = queue.Queue()
+        for _ in range(self.size):
+            self._sessions.put(load_model())
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.size, thread_name_prefix="inference"
+        )
+
+    def _embed_shard(self, texts):
+        model = self._sessions.get()
+        try:
+            return list(model.embed(texts, batch_size=len(texts)))
+        finally:
+            self._sessions.put(model)
+
+    def embed(self, texts):
+        """
+        Embed texts on the pool; returns one vector per text, in order.
+        """
+        n_shards = min(self.size, max(1, len(texts) // self.min_shard_size))
+        if n_shards == 1:
+            return self._embed_shard(texts)
+
+        shard_size = -(-len(texts) // n_shards)
+        futures = [
+            self._executor.submit(self._embed_shard, texts[i : i + shard_size])
+            for i in range(0, len(texts), shard_size)
+        ]
+        vectors = []
+        for future in futures:
+            vectors.extend(future.result())
+        return vectors
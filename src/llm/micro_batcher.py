@@ -0,0 +1,113 @@
+import asyncio
+import logging
+
+logger = logging.getLogger("embedding_api")
+
+
+class _Pending:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts, future):
+        self.texts = texts
+        self.future = future
+
+
+class MicroBatcher:
+    """
+    Merges concurrent embedding requests into one model call.
+
+    Requests queue up while a batch is being computed. The next batch takes
+    queued requests until it holds `max_batch_size` texts or `max_wait_ms`
+    has passed since its first request, runs `run_batch(texts)` in a worker
+    thread, and resolves each caller with its own slice of the result. Up to
+    `max_in_flight` batches run at the same time.
+    """
+
+    def __init__(self, run_batch, max_batch_size=64, max_wait_ms=5.0, max_in_flight=1):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_in_flight = max_in_flight
+        self._slots = None
+        self._tasks = set()
+        self._queue = None
+        self._worker = None
+        self._carry = None
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, texts):
+        """
+        Embed `texts` as part of the next batch; returns their vectors in order.
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(texts, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        first = self._carry or await self._queue.get()
+        self._carry = None
+        batch, size = [first], len(first.texts)
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - loop.time()
+            try:
+                if timeout > 0:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            if size + len(item.texts) > self.max_batch_size:
+                # Keep whole requests together; this one opens the next batch
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item.texts)
+        return batch
+
+    async def _run(self):
+        while True:
+            # Wait for a free slot first so requests keep accumulating meanwhile
+            await self._slots.acquire()
+            batch = await self._collect()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        texts = [text for item in batch for text in item.texts]
+        try:
+            vectors = await loop.run_in_executor(None, self.run_batch, texts)
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        self.batches += 1
+        self.requests += len(batch)
+        start = 0
+        for item in batch:
+            end = start + len(item.texts)
+            if not item.future.done():
+                item.future.set_result(vectors[start:end])
+            start = end
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_in_flight": self.max_in_flight,
+        }
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+
+from llm.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger("embedding_api")
+
+
+class Reranker:
+    """
+    Cross-encoder scoring of (query, document) pairs under a latency cap.
+
+    Documents are scored in retrieval order, `batch_size` at a time, and no new
+    batch starts once `max_latency_ms` has passed; documents left unscored get
+    None. Scores are cached per (query, document) pair, so repeated questions
+    over the same candidates cost no inference. At most `max_concurrent`
+    requests score at once; beyond that, requests are shed (nothing scored)
+    rather than queued, so callers fall back to retrieval order under load.
+    """
+
+    def __init__(
+        self, model, model_name, batch_size=16, cache_entries=50_000, max_concurrent=2
+    ):
+        self.model = model
+        self.batch_size = batch_size
+        self.max_concurrent = max_concurrent
+        # One float32 score per entry
+        self.cache = EmbeddingCache(model_name, max_bytes=cache_entries * 4)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.shed = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.max_concurrent:
+                self.shed += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def score(self, query, documents, max_latency_ms):
+        """
+        Returns (scores aligned with `documents`, shed flag).
+        """
+        pairs = [f"{query}\0{document}" for document in documents]
+        cached = self.cache.get_many(pairs)
+        scores = [None if c is None else float(c[0]) for c in cached]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if not missing:
+            return scores, False
+        if not self._acquire():
+            return scores, True
+
+        try:
+            deadline = time.monotonic() + max_latency_ms / 1000
+            for start in range(0, len(missing), self.batch_size):
+                if start and time.monotonic() >= deadline:
+                    logger.info(
+                        f"Rerank latency cap hit: {start}/{len(missing)} scored"
+                    )
+                    break
+                batch = missing[start : start + self.batch_size]
+                batch_scores = list(
+                    self.model.rerank(
+                        query,
+                        [documents[i] for i in batch],
+                        batch_size=len(batch),
+                    )
+                )
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = float(score)
+                self.cache.set_many(
+                    [pairs[i] for i in batch], [[score] for score in batch_scores]
+                )
+        finally:
+            self._release()
+        return scores, False
+
+    def stats(self):
+        stats = self.cache.stats()
+        with self._lock:
+            stats.update(in_flight=self._in_flight, shed=self.shed)
+        return stats
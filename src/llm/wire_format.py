@@ -0,0 +1,54 @@
+"""
+Binary wire format for embeddings.
+
+Vectors are sent as one contiguous row-major little-endian array, with the
+dimension and model in response headers. Clients ask for it with the Accept
+header; JSON stays the default.
+"""
+
+import numpy as np
+
+JSON_MEDIA_TYPE = "application/json"
+FLOAT32_MEDIA_TYPE = "application/x-embeddings-float32"
+FLOAT16_MEDIA_TYPE = "application/x-embeddings-float16"
+
+DTYPES = {
+    FLOAT32_MEDIA_TYPE: np.dtype("<f4"),
+    FLOAT16_MEDIA_TYPE: np.dtype("<f2"),
+}
+# EMBED_WIRE_FORMAT setting -> media type
+WIRE_FORMATS = {
+    "json": JSON_MEDIA_TYPE,
+    "float32": FLOAT32_MEDIA_TYPE,
+    "float16": FLOAT16_MEDIA_TYPE,
+}
+
+DIM_HEADER = "X-Embedding-Dim"
+MODEL_HEADER = "X-Embedding-Model"
+
+
+def negotiate(accept: str | None) -> str:
+    """
+    Pick the response media type from an Accept header.
+    """
+    for media_type in (accept or "").split(","):
+        media_type = media_type.split(";")[0].strip()
+        if media_type in DTYPES:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def encode_vectors(vectors, media_type: str) -> bytes:
+    return np.asarray(vectors, dtype=DTYPES[media_type]).tobytes()
+
+
+def decode_vectors(content: bytes, media_type: str, dim: int) -> np.ndarray:
+    """
+    Decode a binary response into an (n, dim) float32 array.
+    float32 payloads are wrapped without copying (the array is read-only).
+    """
+    media_type = media_type.split(";")[0].strip()
+    vectors = np.frombuffer(content, dtype=DTYPES[media_type]).reshape(-1, dim)
+    if vectors.dtype != np.float32:
+        vectors = vectors.astype(np.float32)
+    return vectors
@@ -0,0 +1,166 @@
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def load_tokenizer(spec: str):
+    """
+    Load a `tokenizers.Tokenizer` from a tokenizer.json file, a model directory
+    containing one (e.g. the fastembed cache), or a Hugging Face model id.
+    """
+    from tokenizers import Tokenizer
+
+    if os.path.isfile(spec):
+        tokenizer = Tokenizer.from_file(spec)
+    elif os.path.isdir(spec):
+        found = sorted(Path(spec).rglob("tokenizer.json"))
+        if not found:
+            raise FileNotFoundError(f"No tokenizer.json under {spec}")
+        tokenizer = Tokenizer.from_file(str(found[0]))
+    else:
+        tokenizer = Tokenizer.from_pretrained(spec)
+    # Model tokenizers ship with truncation to the model window; we need real counts
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+class TokenChunker:
+    """
+    Builds chunks whose length is measured in embedding-model tokens.
+
+    Short paragraphs are merged until they reach `min_tokens`, nothing exceeds
+    `max_tokens` (long paragraphs are split into windows overlapping by
+    `overlap_tokens`), and tables are split into row groups that repeat the
+    header rows.
+    """
+
+    def __init__(self, tokenizer, min_tokens=64, max_tokens=480, overlap_tokens=32):
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be in [0, max_tokens)")
+        self.tokenizer = tokenizer
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def count(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def split(self, text):
+        """
+        Split text into (piece, n_tokens) windows of at most max_tokens.
+        """
+        encoding = self.tokenizer.encode(text, add_special_tokens=False)
+        n_tokens = len(encoding.ids)
+        if n_tokens <= self.max_tokens:
+            return [(text, n_tokens)]
+
+        pieces = []
+        step = self.max_tokens - self.overlap_tokens
+        for start in range(0, n_tokens, step):
+            end = min(start + self.max_tokens, n_tokens)
+            char_start = encoding.offsets[start][0]
+            char_end = encoding.offsets[end - 1][1]
+            pieces.append((text[char_start:char_end].strip(), end - start))
+            if end == n_tokens:
+                break
+        return pieces
+
+    def pack_paragraphs(self, paragraphs):
+        """
+        Turn page paragraphs into (text, n_tokens) chunks within the token range.
+        """
+        chunks = []
+        parts, counts = [], []
+
+        def flush():
+            if not parts:
+                return
+            # Fold an undersized chunk into the previous one when it still fits
+            if (
+                sum(counts) < self.min_tokens
+                and chunks
+                and chunks[-1][1] + sum(counts) <= self.max_tokens
+            ):
+                previous, previous_count = chunks.pop()
+                parts.insert(0, previous)
+                counts.insert(0, previous_count)
+            text = " ".join(parts)
+            n_tokens = counts[0] if len(parts) == 1 else self.count(text)
+            chunks.append((text, n_tokens))
+            parts.clear()
+            counts.clear()
+
+        for paragraph in paragraphs:
+            for piece, n_tokens in self.split(paragraph):
+                if parts and sum(counts) + n_tokens > self.max_tokens:
+                    flush()
+                parts.append(piece)
+                counts.append(n_tokens)
+                if sum(counts) >= self.min_tokens:
+                    flush()
+        flush()
+        return chunks
+
+    def split_table(self, header_rows, body_rows):
+        """
+        Split a table into (text, n_tokens, n_rows) chunks of at most max_tokens.
+        Every chunk repeats the header rows.
+        """
+        header = "\n".join(header_rows)
+        header_tokens = self.count(header) if header else 0
+        if header_tokens >= self.max_tokens:
+            # Header alone fills the window: split the table as plain text
+            text = "\n".join(header_rows + body_rows)
+            return [(piece, n, len(header_rows)) for piece, n in self.split(text)]
+
+        chunks = []
+        group, group_tokens = [], header_tokens
+
+        def flush():
+            if group:
+                text = "\n".join(header_rows + group)
+                chunks.append((text, self.count(text), len(header_rows) + len(group)))
+                group.clear()
+
+        for row in body_rows:
+            row_tokens = self.count(row)
+            if header_tokens + row_tokens > self.max_tokens:
+                # A single oversized row becomes its own windows
+                flush()
+                group_tokens = header_tokens
+                for piece, n in self.split(row):
+                    chunks.append((piece, n, 1))
+                continue
+            if group and group_tokens + row_tokens > self.max_tokens:
+                flush()
+                group_tokens = header_tokens
+            group.append(row)
+            group_tokens += row_tokens
+        flush()
+
+        if not chunks and header:
+            chunks.append((header, header_tokens, len(header_rows)))
+        return chunks
+
+
+@lru_cache(maxsize=1)
+def get_default_chunker():
+    """
+    The token chunker configured by CHUNK_TOKENIZER, or None when unset.
+    """
+    if not settings.CHUNK_TOKENIZER:
+        return None
+    tokenizer = load_tokenizer(settings.CHUNK_TOKENIZER)
+    logger.info(f"Token-aware chunking with tokenizer {settings.CHUNK_TOKENIZER}")
+    return TokenChunker(
+        tokenizer,
+        min_tokens=settings.CHUNK_MIN_TOKENS,
+        max_tokens=settings.CHUNK_MAX_TOKENS,
+        overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+    )
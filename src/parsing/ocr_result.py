@@ -1,113 +1,181 @@
+import hashlib
 import uuid
 
+from parsing.ocr_stream import iter_document_pages
 
-def extract_text_and_tables(document_proto, min_paragraph_len=50):
+# Fixed namespace so chunk IDs are stable across processes and releases
+CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "astramind/chunks")
+
+
+def make_chunk_id(source, page, chunk_type, text):
+    """
+    Deterministic chunk ID derived from where the chunk comes from and what it says.
+    Returned as a UUID string so it is also a valid Qdrant point ID.
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    name = f"{source}|{page}|{chunk_type}|{text_hash}"
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, name))
+
+
+def extract_text_and_tables(
+    document_proto, min_paragraph_len=50, source="", chunker=None, page_offset=0
+):
     chunks = []
     full_text = document_proto.get("text", "")
 
     for page in document_proto.get("pages", []):
-        page_number = page.get("pageNumber")
-
-        para_buffer = ""
-        for paragraph in page.get("paragraphs", []):
-            para_text = extract_text_from_anchor(
-                full_text, paragraph.get("layout", {}).get("textAnchor", {})
-            )
-            if not para_text.strip():
-                continue
-            if len(para_text) < min_paragraph_len:
-                para_buffer += " " + para_text.strip()
-            else:
-                if para_buffer:
-                    chunks.append(
-                        {
-                            "id": str(uuid.uuid4()),
-                            "type": "paragraph",
-                            "text": para_buffer.strip(),
-                            "page": page_number,
-                        }
-                    )
-                    para_buffer = ""
-                chunks.append(
-                    {
-                        "id": str(uuid.uuid4()),
-                        "type": "paragraph",
-                        "text": para_text.strip(),
-                        "page": page_number,
-                    }
-                )
-        if para_buffer:
-            chunks.append(
-                {
-                    "id": str(uuid.uuid4()),
-                    "type": "paragraph",
-                    "text": para_buffer.strip(),
-                    "page": page_number,
-                }
-            )
-        # --- Extract tables as Markdown ---
-        for table in page.get("tables", []):
-            table_text = extract_table_as_markdown(full_text, table)
-            row_count = len(table.get("bodyRows", [])) + len(
-                table.get("headerRows", [])
+        chunks.extend(
+            extract_page_chunks(
+                full_text, page, min_paragraph_len, source, chunker, page_offset
             )
-            if table_text.strip():
-                chunks.append(
-                    {
-                        "id": str(uuid.uuid4()),
-                        "type": "table",
-                        "text": table_text.strip(),
-                        "page": page_number,
-                        "rows": row_count,
-                    }
-                )
+        )
     return chunks
 
 
-def extract_text_from_anchor(full_text, anchor):
+def extract_text_and_tables_streaming(
+    fp, min_paragraph_len=50, source="", chunker=None, page_offset=0
+):
     """
-    Given a text anchor (Document AI format), extract actual text.
+    Same as extract_text_and_tables, but reads the Document AI JSON from a
+    binary file object one page at a time instead of loading it whole.
     """
-    if not anchor or "textSegments" not in anchor:
-        return ""
-    result = ""
-    for segment in anchor["textSegments"]:
-        start = int(segment.get("startIndex", 0))
-        end = int(segment.get("endIndex", 0))
-        result += full_text[start:end]
-    return result
+    chunks = []
+    for full_text, page in iter_document_pages(fp):
+        chunks.extend(
+            extract_page_chunks(
+                full_text, page, min_paragraph_len, source, chunker, page_offset
+            )
+        )
+    return chunks
 
 
-def extract_table_as_markdown(full_text, table):
+def extract_page_chunks(
+    full_text, page, min_paragraph_len=50, source="", chunker=None, page_offset=0
+):
     """
-    Extract a table as Markdown (or CSV-like text) for easy embedding.
+    Chunk one Document AI page into merged paragraphs and Markdown tables.
+    `page_offset` is added to page numbers, for documents OCR'd as page ranges.
+
+    With a parsing.chunking.TokenChunker, chunk sizes follow its token range
+    instead of `min_paragraph_len`, large tables are split into row groups and
+    each chunk records its token count under "tokens".
     """
-    if "headerRows" in table:
-        header_rows = table["headerRows"]
-    else:
-        header_rows = []
-    body_rows = table.get("bodyRows", [])
+    chunks = []
+    page_number = page.get("pageNumber")
+    if page_number is not None:
+        page_number += page_offset
 
-    rows = []
+    def add_chunk(chunk_type, text, **extra):
+        chunks.append(
+            {
+                "id": make_chunk_id(source, page_number, chunk_type, text),
+                "type": chunk_type,
+                "text": text,
+                "page": page_number,
+                **extra,
+            }
+        )
 
-    # Extract header
-    for row in header_rows:
-        row_text = [
-            extract_text_from_anchor(
-                full_text, cell.get("layout", {}).get("textAnchor", {})
-            )
-            for cell in row.get("cells", [])
+    if chunker is not None:
+        paragraphs = [
+            text.strip()
+            for text in anchored_texts(full_text, page.get("paragraphs", []))
+            if text.strip()
         ]
-        rows.append(" | ".join(cell.strip() for cell in row_text))
+        for text, n_tokens in chunker.pack_paragraphs(paragraphs):
+            add_chunk("paragraph", text, tokens=n_tokens)
+        for table in page.get("tables", []):
+            header_rows = table_rows_as_text(full_text, table.get("headerRows", []))
+            body_rows = table_rows_as_text(full_text, table.get("bodyRows", []))
+            for text, n_tokens, n_rows in chunker.split_table(header_rows, body_rows):
+                if text.strip():
+                    add_chunk("table", text.strip(), rows=n_rows, tokens=n_tokens)
+        return chunks
+
+    # Short paragraphs are collected and joined once when flushed
+    short_parts = []
+    for para_text in anchored_texts(full_text, page.get("paragraphs", [])):
+        stripped = para_text.strip()
+        if not stripped:
+            continue
+        if len(para_text) < min_paragraph_len:
+            short_parts.append(stripped)
+        else:
+            if short_parts:
+                add_chunk("paragraph", " ".join(short_parts))
+                short_parts = []
+            add_chunk("paragraph", stripped)
+    if short_parts:
+        add_chunk("paragraph", " ".join(short_parts))
+
+    # --- Extract tables as Markdown ---
+    for table in page.get("tables", []):
+        table_text = extract_table_as_markdown(full_text, table).strip()
+        row_count = len(table.get("bodyRows", [])) + len(table.get("headerRows", []))
+        if table_text:
+            add_chunk("table", table_text, rows=row_count)
+    return chunks
 
-    # Extract body
-    for row in body_rows:
-        row_text = [
-            extract_text_from_anchor(
-                full_text, cell.get("layout", {}).get("textAnchor", {})
+
+def anchor_offsets(anchor):
+    """
+    Integer (start, end) pairs of a Document AI text anchor.
+    """
+    if not anchor:
+        return []
+    return [
+        (int(segment.get("startIndex", 0)), int(segment.get("endIndex", 0)))
+        for segment in anchor.get("textSegments", ())
+    ]
+
+
+def anchored_texts(full_text, elements):
+    """
+    Text of each paragraph or table cell in `elements`, in order.
+
+    Offsets are resolved in one pass per page; the common single-segment
+    anchor is a plain slice, multi-segment anchors are joined.
+    """
+    texts = []
+    for element in elements:
+        anchor = element.get("layout", {}).get("textAnchor")
+        segments = anchor.get("textSegments") if anchor else None
+        if not segments:
+            texts.append("")
+        elif len(segments) == 1:
+            segment = segments[0]
+            start = int(segment.get("startIndex", 0))
+            texts.append(full_text[start : int(segment.get("endIndex", 0))])
+        else:
+            texts.append(
+                "".join([full_text[start:end] for start, end in anchor_offsets(anchor)])
             )
-            for cell in row.get("cells", [])
-        ]
-        rows.append(" | ".join(cell.strip() for cell in row_text))
+    return texts
+
+
+def extract_text_from_anchor(full_text, anchor):
+    """
+    Given a text anchor (Document AI format), extract actual text.
+    """
+    return "".join([full_text[start:end] for start, end in anchor_offsets(anchor)])
+
+
+def table_rows_as_text(full_text, rows):
+    """
+    One " | "-separated line per table row.
+    """
+    return [
+        " | ".join(
+            [cell.strip() for cell in anchored_texts(full_text, row.get("cells", []))]
+        )
+        for row in rows
+    ]
+
 
+def extract_table_as_markdown(full_text, table):
+    """
+    Extract a table as Markdown (or CSV-like text) for easy embedding.
+    """
+    rows = table_rows_as_text(full_text, table.get("headerRows", []))
+    rows += table_rows_as_text(full_text, table.get("bodyRows", []))
     return "\n".join(rows)
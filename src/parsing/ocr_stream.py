@@ -0,0 +1,78 @@
+from functools import lru_cache
+
+import ijson
+
+# Paths inside a Document AI page that extract_page_chunks reads. Everything
+# else (tokens, lines, blocks, bounding polys, images...) is skipped while
+# streaming and never materialised.
+_PAGE_FIELDS = (
+    "pageNumber",
+    "paragraphs.item.layout.textAnchor",
+    "tables.item.headerRows.item.cells.item.layout.textAnchor",
+    "tables.item.bodyRows.item.cells.item.layout.textAnchor",
+)
+_PAGE_PREFIX = "pages.item"
+
+
+@lru_cache(maxsize=None)
+def _wanted(path):
+    """
+    True if `path` (relative to a page) is a kept field, inside one, or on the
+    way to one.
+    """
+    if not path:
+        return True
+    return any(
+        field == path or field.startswith(path + ".") or path.startswith(field + ".")
+        for field in _PAGE_FIELDS
+    )
+
+
+def _relative(prefix):
+    return prefix[len(_PAGE_PREFIX) + 1 :]
+
+
+def iter_document_pages(fp):
+    """
+    Stream a Document AI JSON document from a binary file object.
+
+    Yields (full_text, page) for each page, where `page` only holds the
+    fields listed in _PAGE_FIELDS. Peak memory is the document text plus one
+    pruned page, whatever the size of the token and layout arrays.
+    """
+    full_text = None
+    # Pages seen before "text" (not the order Document AI writes) wait here
+    waiting = []
+    builder = None
+
+    for prefix, event, value in ijson.parse(fp):
+        if builder is None:
+            if prefix == "text" and event == "string":
+                full_text = value
+                yield from ((full_text, page) for page in waiting)
+                waiting = []
+            elif prefix == _PAGE_PREFIX and event == "start_map":
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            continue
+
+        if prefix == _PAGE_PREFIX and event == "end_map":
+            builder.event(event, value)
+            page = builder.value
+            builder = None
+            if full_text is None:
+                waiting.append(page)
+            else:
+                yield full_text, page
+            continue
+
+        path = _relative(prefix)
+        if event == "map_key":
+            keep = _wanted(f"{path}.{value}" if path else value)
+        else:
+            keep = _wanted(path)
+        if keep:
+            builder.event(event, value)
+
+    if waiting:
+        yield from (("" if full_text is None else full_text, page) for page in waiting)
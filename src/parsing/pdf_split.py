@@ -0,0 +1,26 @@
+import io
+
+from pypdf import PdfReader, PdfWriter
+
+
+def split_pdf(pdf_bytes, pages_per_part):
+    """
+    Split a PDF into consecutive page ranges of at most `pages_per_part` pages.
+    Returns [(first_page, last_page, part_bytes)], pages numbered from 1; a PDF
+    that fits in one part comes back as a single range holding the original bytes.
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    n_pages = len(reader.pages)
+    if n_pages <= pages_per_part:
+        return [(1, n_pages, pdf_bytes)]
+
+    parts = []
+    for start in range(0, n_pages, pages_per_part):
+        end = min(start + pages_per_part, n_pages)
+        writer = PdfWriter()
+        for page in reader.pages[start:end]:
+            writer.add_page(page)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        parts.append((start + 1, end, buffer.getvalue()))
+    return parts
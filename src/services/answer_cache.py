@@ -0,0 +1,261 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+import redis
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchValue,
+    OrderBy,
+    PayloadSchemaType,
+    PointStruct,
+    Range,
+)
+
+from storage.vector.collection import (
+    ensure_payload_indexes,
+    ensure_qdrant_collection,
+    qdrant_client,
+)
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+CORPUS_VERSION_KEY = "corpus:version"
+STATS_KEY = "answer_cache:stats"
+ANSWER_CACHE_INDEXES = {
+    "corpus_version": PayloadSchemaType.INTEGER,
+    "created_at": PayloadSchemaType.FLOAT,
+    "scope": PayloadSchemaType.KEYWORD,
+}
+
+redis_client = redis.Redis.from_url(settings.ANSWER_CACHE_REDIS_URL)
+
+_ready = set()
+_ready_lock = threading.Lock()
+_writes = 0
+
+
+def get_corpus_version():
+    """
+    Current corpus version; bumped by every ingestion that changes the chunks.
+    """
+    return int(redis_client.get(CORPUS_VERSION_KEY) or 0)
+
+
+def bump_corpus_version():
+    """
+    Invalidate every cached answer by moving to a new corpus version.
+    """
+    version = redis_client.incr(CORPUS_VERSION_KEY)
+    logger.info(f"Corpus version is now {version}")
+    return version
+
+
+def _ensure_cache_collection(vector_size, collection):
+    key = (os.getpid(), collection)
+    if key in _ready:
+        return
+    with _ready_lock:
+        if key not in _ready:
+            ensure_qdrant_collection(
+                qdrant_client,
+                collection,
+                vector_size,
+                Distance.COSINE,
+                quantization="",
+                hybrid=False,
+            )
+            ensure_payload_indexes(qdrant_client, collection, ANSWER_CACHE_INDEXES)
+            _ready.add(key)
+
+
+def _record(**counters):
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for name, amount in counters.items():
+            pipe.hincrbyfloat(STATS_KEY, name, amount)
+        pipe.execute()
+    except redis.RedisError as err:
+        logger.warning(f"Answer cache metrics update failed: {err}")
+
+
+def lookup_answer(
+    query_embedding,
+    scope="",
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    ttl_seconds=settings.ANSWER_CACHE_TTL,
+    collection=settings.ANSWER_CACHE_COLLECTION,
+):
+    """
+    Most similar cached answer for this corpus version and `scope` (e.g. the
+    document filter), if its similarity is at least `threshold` and it is not
+    older than `ttl_seconds`. Returns the payload dict plus "score", or None.
+
+    Lookups count as hits or misses in the stats, with the best match's
+    similarity, so the threshold can be tuned from real traffic.
+    """
+    try:
+        _ensure_cache_collection(len(query_embedding), collection)
+        version = get_corpus_version()
+        points = qdrant_client.query_points(
+            collection_name=collection,
+            query=query_embedding,
+            query_filter=Filter(
+                must=[
+                    FieldCondition(
+                        key="corpus_version", match=MatchValue(value=version)
+                    ),
+                    FieldCondition(key="scope", match=MatchValue(value=scope)),
+                    FieldCondition(
+                        key="created_at", range=Range(gte=time.time() - ttl_seconds)
+                    ),
+                ]
+            ),
+            limit=1,
+            with_payload=True,
+        ).points
+    except Exception as err:
+        logger.warning(f"Answer cache lookup failed: {err}")
+        return None
+
+    if not points:
+        _record(misses=1)
+        return None
+    hit = points[0]
+    # Best-match similarity histogram (0.01 buckets), to tune the threshold
+    bucket = f"score_{int(hit.score * 100) / 100:.2f}"
+    if hit.score < threshold:
+        _record(misses=1, **{bucket: 1})
+        return None
+    _record(hits=1, saved_ms=hit.payload.get("generation_ms", 0), **{bucket: 1})
+    return {**hit.payload, "score": hit.score}
+
+
+def store_answer(
+    query_embedding,
+    query,
+    answer,
+    chunks,
+    generation_ms,
+    scope="",
+    collection=settings.ANSWER_CACHE_COLLECTION,
+):
+    """
+    Cache a generated answer with the retrieved chunks it cites (id, source, page)
+    and how long generation took, for the saved-latency metric.
+    """
+    try:
+        _ensure_cache_collection(len(query_embedding), collection)
+        qdrant_client.upsert(
+            collection_name=collection,
+            points=[
+                PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=list(map(float, query_embedding)),
+                    payload={
+                        "query": query,
+                        "answer": answer,
+                        "chunks": [
+                            {
+                                "id": chunk.get("id"),
+                                "source": chunk.get("source"),
+                                "page": chunk.get("page"),
+                            }
+                            for chunk in chunks
+                        ],
+                        "generation_ms": generation_ms,
+                        "corpus_version": get_corpus_version(),
+                        "scope": scope,
+                        "created_at": time.time(),
+                    },
+                )
+            ],
+        )
+    except Exception as err:
+        logger.warning(f"Answer cache store failed: {err}")
+        return
+
+    global _writes
+    _writes += 1
+    if _writes % settings.ANSWER_CACHE_PRUNE_EVERY == 0:
+        prune_answer_cache(collection=collection)
+
+
+def prune_answer_cache(
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ANSWER_CACHE_TTL,
+    collection=settings.ANSWER_CACHE_COLLECTION,
+):
+    """
+    Delete expired and previous-version entries, then the oldest entries
+    beyond `max_entries`.
+    """
+    try:
+        qdrant_client.delete(
+            collection_name=collection,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    should=[
+                        FieldCondition(
+                            key="created_at",
+                            range=Range(lt=time.time() - ttl_seconds),
+                        ),
+                        FieldCondition(
+                            key="corpus_version",
+                            range=Range(lt=get_corpus_version()),
+                        ),
+                    ]
+                )
+            ),
+        )
+        overflow = (
+            qdrant_client.count(collection_name=collection, exact=True).count
+            - max_entries
+        )
+        if overflow > 0:
+            oldest, _ = qdrant_client.scroll(
+                collection_name=collection,
+                order_by=OrderBy(key="created_at"),
+                limit=overflow,
+                with_payload=False,
+            )
+            qdrant_client.delete(
+                collection_name=collection,
+                points_selector=[point.id for point in oldest],
+            )
+            logger.info(f"Evicted {len(oldest)} answer cache entries")
+    except Exception as err:
+        logger.warning(f"Answer cache pruning failed: {err}")
+
+
+def answer_cache_stats():
+    """
+    Hit rate, generation time saved by replaying cached answers, and how often
+    the best match fell in each similarity bucket.
+    """
+    raw = redis_client.hgetall(STATS_KEY)
+    stats = {key.decode(): float(value) for key, value in raw.items()}
+    buckets = {
+        key.removeprefix("score_"): int(value)
+        for key, value in sorted(stats.items())
+        if key.startswith("score_")
+    }
+    hits = stats.get("hits", 0.0)
+    misses = stats.get("misses", 0.0)
+    lookups = hits + misses
+    return {
+        "hits": int(hits),
+        "misses": int(misses),
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "saved_ms": stats.get("saved_ms", 0.0),
+        "avg_saved_ms": stats.get("saved_ms", 0.0) / hits if hits else 0.0,
+        "threshold": settings.ANSWER_CACHE_THRESHOLD,
+        "best_match_scores": buckets,
+        "corpus_version": get_corpus_version(),
+    }
@@ -1,7 +1,20 @@
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-from cloud_io.gcs import download_json_from_gcs, list_gcs_json_files_recursively
-from parsing.ocr_result import extract_text_and_tables
+from cloud_io.object_store import get_object_store
+from parsing.chunking import get_default_chunker
+from parsing.ocr_result import (
+    extract_text_and_tables,
+    extract_text_and_tables_streaming,
+)
+from storage.db.read import get_chunk_ids_for_source, get_existing_chunk_ids
+from storage.db.write import delete_chunks_from_postgres
+from storage.vector.read import get_existing_point_ids
+from storage.vector.write import delete_chunks_from_qdrant
+from utils.batch import batch_iterable
+from utils.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +39,130 @@ logger = logging.getLogger(__name__)
 
 
 #     return chunks
-def process_ocr_outputs_from_gcs_yield(output_prefix: str):
-    files = list_gcs_json_files_recursively(output_prefix)
-    for blob_name in files:
-        if not blob_name.endswith(".json"):
-            continue
-        try:
-            document_proto = download_json_from_gcs(blob_name)
-            doc_chunks = extract_text_and_tables(document_proto)
-            for chunk in doc_chunks:
+def load_shard_chunks(
+    blob_name: str,
+    source: str = "",
+    streaming: bool = settings.OCR_STREAMING_PARSE,
+    chunker=None,
+    page_offset: int = 0,
+):
+    """
+    Download one OCR output shard and parse it into chunks.
+    With `streaming`, the shard is parsed page by page straight from the blob.
+    """
+    store = get_object_store()
+    if streaming:
+        with store.open(blob_name) as fp:
+            return extract_text_and_tables_streaming(
+                fp, source=source, chunker=chunker, page_offset=page_offset
+            )
+    document_proto = store.read_json(blob_name)
+    return extract_text_and_tables(
+        document_proto, source=source, chunker=chunker, page_offset=page_offset
+    )
+
+
+def process_ocr_outputs_from_gcs_yield(
+    output_prefix: str,
+    source: str = "",
+    prefetch: int = settings.OCR_PREFETCH_SHARDS,
+    failed_shards: list | None = None,
+    chunker=None,
+    page_offset: int = 0,
+):
+    """
+    Yield chunks from every OCR JSON shard under output_prefix, in shard order.
+
+    Up to `prefetch` shards are downloaded and parsed in a thread pool while the
+    current one is being consumed, so at most `prefetch + 1` parsed shards are
+    held in memory. A shard that fails is logged, appended to `failed_shards`
+    (if given) and skipped. `source` feeds the deterministic chunk IDs.
+    `chunker` defaults to the token chunker configured by CHUNK_TOKENIZER.
+    `page_offset` is added to page numbers (OCR output of a page range).
+    """
+    if chunker is None:
+        chunker = get_default_chunker()
+
+    def load(blob_name):
+        return load_shard_chunks(
+            blob_name, source, chunker=chunker, page_offset=page_offset
+        )
+
+    files = get_object_store().list(output_prefix, suffix=".json")
+
+    if prefetch <= 1:
+        for blob_name in files:
+            try:
+                doc_chunks = load(blob_name)
+            except Exception as err:
+                logger.exception(f"Failed to parse {blob_name}: {err}")
+                if failed_shards is not None:
+                    failed_shards.append(blob_name)
+                continue
+            yield from doc_chunks
+        return
+
+    pool = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="shard")
+    pending = deque()
+    remaining = iter(files)
+    try:
+        for blob_name in islice(remaining, prefetch):
+            pending.append((blob_name, pool.submit(load, blob_name)))
+
+        while pending:
+            blob_name, future = pending.popleft()
+            # Keep the window full before handing the current shard downstream
+            next_blob = next(remaining, None)
+            if next_blob is not None:
+                pending.append((next_blob, pool.submit(load, next_blob)))
+            try:
+                doc_chunks = future.result()
+            except Exception as err:
+                logger.exception(f"Failed to parse {blob_name}: {err}")
+                if failed_shards is not None:
+                    failed_shards.append(blob_name)
+                continue
+            yield from doc_chunks
+    finally:
+        # Consumer stopped early or failed: drop shards not started yet
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+def skip_unchanged_chunks(
+    chunks, seen_ids: set, lookup_size=1000, collection=settings.QDRANT_COLLECTION
+):
+    """
+    Yield only chunks whose ID is not already stored.
+
+    Chunk IDs are content-derived, so an existing ID means the chunk is
+    unchanged since the last ingestion. A chunk is skipped only if it has a
+    Postgres row and a point in `collection`, so pointing QDRANT_COLLECTION
+    at a new (e.g. hybrid) collection and re-ingesting fills it. Every ID seen
+    is added to `seen_ids` so stale chunks can be pruned afterwards.
+    """
+    for chunk_batch in batch_iterable(chunks, lookup_size):
+        ids = [c["id"] for c in chunk_batch]
+        seen_ids.update(ids)
+        existing = get_existing_chunk_ids(ids)
+        if existing:
+            existing = get_existing_point_ids(collection, existing)
+        for chunk in chunk_batch:
+            if chunk["id"] not in existing:
                 yield chunk
-        except Exception as err:
-            logger.exception(f"Failed to parse {blob_name}: {err}")
+
+
+def prune_stale_chunks(
+    source: str, seen_ids: set, collection=settings.QDRANT_COLLECTION
+):
+    """
+    Delete chunks previously ingested for `source` that the latest OCR output
+    no longer produces. Returns the number of chunks removed.
+    """
+    stale_ids = get_chunk_ids_for_source(source) - seen_ids
+    if stale_ids:
+        delete_chunks_from_qdrant(collection, stale_ids)
+        delete_chunks_from_postgres(stale_ids)
+        logger.info(f"Pruned {len(stale_ids)} stale chunks for {source}")
+    return len(stale_ids)
@@ -0,0 +1,80 @@
+import logging
+
+from cloud_io.object_store import get_object_store
+from parsing.pdf_split import split_pdf
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTS_PREFIX = "ocr_parts/"
+
+
+def prepare_ocr_parts(
+    source_uri: str,
+    blob_name: str,
+    generation: int,
+    pages_per_part: int = settings.OCR_SPLIT_PAGES,
+):
+    """
+    Page ranges to OCR for one PDF, as [{"input", "first_page"}].
+
+    PDFs longer than `pages_per_part` are split, and the parts written under
+    ocr_parts/, so Document AI processes them in parallel within the batch.
+    Shorter PDFs (or any PDF with `pages_per_part` 0) are sent whole.
+    """
+    whole = [{"input": source_uri, "first_page": 1}]
+    if pages_per_part <= 0:
+        return whole
+    store = get_object_store()
+    parts = split_pdf(store.read(store.name(source_uri)), pages_per_part)
+    if len(parts) == 1:
+        return whole
+
+    entries = []
+    for first_page, last_page, data in parts:
+        name = (
+            f"{PARTS_PREFIX}{blob_name}/{generation}/"
+            f"pages-{first_page:05d}-{last_page:05d}.pdf"
+        )
+        store.write(name, data)
+        entries.append({"input": store.uri(name), "first_page": first_page})
+    logger.info(
+        f"Split {blob_name} into {len(entries)} parts of {pages_per_part} pages"
+    )
+    return entries
+
+
+def collect_ocr_parts(parts, result):
+    """
+    Fill in each part's "output" prefix from a finished get_ocr_operation
+    result. Returns (parts, error), error being None if every part succeeded.
+    """
+    collected = []
+    errors = []
+    for part in parts:
+        status = result["documents"].get(part["input"])
+        if status is None or not status["ok"]:
+            reason = status["error"] if status else result["error"] or "no status"
+            errors.append(f"{part['input']}: {reason}")
+        collected.append({**part, "output": status["output"] if status else None})
+    return collected, "; ".join(errors) or None
+
+
+def ocr_outputs(parts):
+    """
+    [[output_prefix, first_page]] for the chunk/embed step, or None unless
+    every part has been OCR'd.
+    """
+    if not parts or not all(part.get("output") for part in parts):
+        return None
+    return [[part["output"], part["first_page"]] for part in parts]
+
+
+def delete_ocr_parts(parts, source_uri):
+    """
+    Remove the split page-range PDFs once OCR no longer needs them.
+    """
+    store = get_object_store()
+    names = [store.name(part["input"]) for part in parts if part["input"] != source_uri]
+    if names:
+        store.delete_many(names)
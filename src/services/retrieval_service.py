@@ -1,23 +1,100 @@
+import logging
+
 from cloud_io.gcs import generate_gcs_signed_url
+from llm.embeddings import rerank_texts, rerank_texts_async
+from utils.config import settings
 
+logger = logging.getLogger(__name__)
 
-def build_rag_prompt(user_query, retrieved_chunks, url_expiry_sec=600):
+
+def order_by_rerank(chunks, scores):
     """
-    Build LLM prompt and references, attaching presigned URLs to sources.
+    Scored chunks by descending score, then unscored ones in retrieval order.
+    """
+    scored = [(s, i) for i, s in enumerate(scores) if s is not None]
+    scored.sort(key=lambda pair: (-pair[0], pair[1]))
+    unscored = [i for i, s in enumerate(scores) if s is None]
+    ordered = []
+    for score, i in scored:
+        ordered.append({**chunks[i], "rerank_score": score})
+    ordered.extend(chunks[i] for i in unscored)
+    return ordered
+
+
+def rerank_chunks(
+    user_query,
+    chunks,
+    top_n=settings.RERANK_TOP_N,
+    max_latency_ms=settings.RERANK_MAX_LATENCY_MS,
+):
+    """
+    Keep the `top_n` of the retrieved `chunks` the cross-encoder ranks highest.
+    Reranking is best effort: if the service fails, keep retrieval order.
+    """
+    if len(chunks) <= 1:
+        return chunks[:top_n]
+    try:
+        scores = rerank_texts(
+            user_query,
+            [chunk["text"] for chunk in chunks],
+            max_latency_ms=max_latency_ms,
+        )
+    except Exception as err:
+        logger.warning(f"Reranking failed, using retrieval order: {err}")
+        return chunks[:top_n]
+    return order_by_rerank(chunks, scores)[:top_n]
+
+
+async def rerank_chunks_async(
+    user_query,
+    chunks,
+    top_n=settings.RERANK_TOP_N,
+    max_latency_ms=settings.RERANK_MAX_LATENCY_MS,
+):
+    """
+    Async rerank_chunks.
+    """
+    if len(chunks) <= 1:
+        return chunks[:top_n]
+    try:
+        scores = await rerank_texts_async(
+            user_query,
+            [chunk["text"] for chunk in chunks],
+            max_latency_ms=max_latency_ms,
+        )
+    except Exception as err:
+        logger.warning(f"Reranking failed, using retrieval order: {err}")
+        return chunks[:top_n]
+    return order_by_rerank(chunks, scores)[:top_n]
+
+
+def citation_url(chunk, url_expiry_sec=600, links=settings.CITATION_LINKS):
+    """
+    Link for a cited chunk: the lazy /source/{chunk_id} redirect in "redirect"
+    mode, otherwise a (cached) signed URL. None if no link can be made.
+    """
+    if links == "redirect" and chunk.get("id"):
+        return f"/source/{chunk['id']}"
+    try:
+        return generate_gcs_signed_url(
+            chunk.get("source", "unknown"), expiration_seconds=url_expiry_sec
+        )
+    except Exception:
+        return None
+
+
+def build_references(chunks, url_expiry_sec=600):
+    """
+    One "[Source N]: file, page" reference per chunk, linking the file when
+    possible (see citation_url).
     """
-    chunk_texts = []
     references = []
-    for i, chunk in enumerate(retrieved_chunks):
+    for i, chunk in enumerate(chunks):
         label = f"[Source {i+1}]"
         source_path = chunk.get("source", "unknown")
         file_name = source_path.split("/")[-1] if "/" in source_path else source_path
         page = chunk.get("page", "?")
-        try:
-            url = generate_gcs_signed_url(
-                source_path, expiration_seconds=url_expiry_sec
-            )
-        except Exception:
-            url = None
+        url = citation_url(chunk, url_expiry_sec)
         if url:
             ref = (
                 f'{label}: <a href="{url}" target="_blank">{file_name}</a>, page {page}'
@@ -25,7 +102,17 @@ def build_rag_prompt(user_query, retrieved_chunks, url_expiry_sec=600):
         else:
             ref = f"{label}: {file_name}, page {page}"
         references.append(ref)
-        chunk_texts.append(f"{label}\n{chunk['text']}")
+    return references
+
+
+def build_rag_prompt(user_query, retrieved_chunks, url_expiry_sec=600):
+    """
+    Build LLM prompt and references, attaching presigned URLs to sources.
+    """
+    references = build_references(retrieved_chunks, url_expiry_sec)
+    chunk_texts = [
+        f"[Source {i+1}]\n{chunk['text']}" for i, chunk in enumerate(retrieved_chunks)
+    ]
     context = "\n\n".join(chunk_texts)
     prompt = (
         f"You are a technical assistant. "
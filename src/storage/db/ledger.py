@@ -0,0 +1,267 @@
+from datetime import timedelta
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from storage.db.models import Document
+from storage.db.session import get_db_session
+from utils.config import settings
+
+DISCOVERED = "discovered"
+OCR_RUNNING = "ocr_running"
+OCR_DONE = "ocr_done"
+EMBEDDED = "embedded"
+FAILED = "failed"
+
+
+def get_scan_watermark():
+    """
+    Latest blob update time recorded by the scanner, or None before the first scan.
+    """
+    with get_db_session() as session:
+        return session.query(func.max(Document.blob_updated)).scalar()
+
+
+def record_discovered(objects):
+    """
+    Upsert scanned PDFs ({"name", "generation", "updated", "uri"} dicts).
+
+    New blobs, and known blobs whose generation changed (re-uploaded), are
+    (re)set to "discovered"; rows for an unchanged generation are left alone.
+    Returns how many rows were inserted or reset.
+    """
+    rows = [
+        {
+            "blob_name": obj["name"],
+            "generation": obj["generation"],
+            "blob_updated": obj["updated"],
+            "source_uri": obj["uri"],
+            "state": DISCOVERED,
+            "attempts": 0,
+        }
+        for obj in objects
+    ]
+    if not rows:
+        return 0
+    stmt = insert(Document).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Document.blob_name],
+        set_={
+            "generation": stmt.excluded.generation,
+            "blob_updated": stmt.excluded.blob_updated,
+            "source_uri": stmt.excluded.source_uri,
+            "state": DISCOVERED,
+            "attempts": 0,
+            "error": None,
+            "output_prefix": None,
+            "ocr_operation": None,
+            "ocr_parts": None,
+            # A task still working on the old generation must not hold the
+            # new one's lock
+            "locked_at": None,
+        },
+        where=Document.generation != stmt.excluded.generation,
+    )
+    with get_db_session() as session:
+        changed = session.execute(stmt).rowcount
+        session.commit()
+    return changed
+
+
+def _lock_free(lock_timeout):
+    return or_(
+        Document.locked_at.is_(None),
+        Document.locked_at < func.now() - timedelta(seconds=lock_timeout),
+    )
+
+
+def claim_document(
+    blob_name,
+    generation,
+    from_states,
+    to_state,
+    lock_timeout=settings.LEDGER_LOCK_TIMEOUT,
+):
+    """
+    Take the document's lock for one processing step.
+
+    A single conditional UPDATE succeeds only if the row is still at
+    `generation`, in one of `from_states`, and unlocked (or its lock is older
+    than `lock_timeout` seconds, i.e. its worker died), so concurrent tasks
+    for the same document cannot both win. Returns True if claimed.
+    """
+    stmt = (
+        update(Document)
+        .where(
+            Document.blob_name == blob_name,
+            Document.generation == generation,
+            Document.state.in_(from_states),
+            _lock_free(lock_timeout),
+        )
+        .values(
+            state=to_state,
+            locked_at=func.now(),
+            attempts=Document.attempts + 1,
+            error=None,
+        )
+    )
+    with get_db_session() as session:
+        claimed = session.execute(stmt).rowcount == 1
+        session.commit()
+    return claimed
+
+
+def release_document(blob_name, generation, state, **fields):
+    """
+    Record the outcome of a step (`state` plus e.g. source_uri, output_prefix,
+    error) and drop the lock. If the blob was re-uploaded meanwhile, the row
+    already describes the new generation and is left alone, including any
+    lock a task holds on it.
+
+    Reaching "ocr_done" resets `attempts`, so OCR and embedding each get
+    LEDGER_MAX_ATTEMPTS tries.
+    """
+    if state == OCR_DONE:
+        fields["attempts"] = 0
+    with get_db_session() as session:
+        session.execute(
+            update(Document)
+            .where(Document.blob_name == blob_name, Document.generation == generation)
+            .values(state=state, locked_at=None, **fields)
+        )
+        session.commit()
+
+
+def start_ocr(blob_name, generation, operation, parts):
+    """
+    Record the batch OCR operation a claimed document was submitted in, and the
+    page ranges sent. The lock is kept until the poller sees the operation end.
+    """
+    with get_db_session() as session:
+        session.execute(
+            update(Document)
+            .where(Document.blob_name == blob_name, Document.generation == generation)
+            .values(ocr_operation=operation, ocr_parts=parts, locked_at=func.now())
+        )
+        session.commit()
+
+
+def ocr_in_flight():
+    """
+    Documents waiting on a batch OCR operation, grouped by operation name.
+    """
+    with get_db_session() as session:
+        docs = (
+            session.query(Document)
+            .filter(
+                Document.state == OCR_RUNNING,
+                Document.ocr_operation.is_not(None),
+                Document.locked_at.is_not(None),
+            )
+            .all()
+        )
+    operations = {}
+    for doc in docs:
+        operations.setdefault(doc.ocr_operation, []).append(doc)
+    return operations
+
+
+def claim_ocr_result(blob_name, generation, operation):
+    """
+    Take over a document whose batch OCR `operation` has finished, so only one
+    poller moves it and dispatches its embedding.
+
+    A single conditional UPDATE succeeds only while the row is still running
+    that operation, and detaches it (ocr_operation is cleared, the lock
+    refreshed); a poller that loses the race gets False and leaves the
+    document alone. If the winner dies, the stale lock makes the document
+    dispatchable again.
+    """
+    stmt = (
+        update(Document)
+        .where(
+            Document.blob_name == blob_name,
+            Document.generation == generation,
+            Document.state == OCR_RUNNING,
+            Document.ocr_operation == operation,
+        )
+        .values(ocr_operation=None, locked_at=func.now())
+    )
+    with get_db_session() as session:
+        claimed = session.execute(stmt).rowcount == 1
+        session.commit()
+    return claimed
+
+
+def touch_documents(blob_names):
+    """
+    Refresh the locks of documents still being worked on (OCR operation
+    running, embedding in progress), so a slow job is not mistaken for a dead
+    worker.
+    """
+    with get_db_session() as session:
+        session.execute(
+            update(Document)
+            .where(Document.blob_name.in_(blob_names), Document.locked_at.is_not(None))
+            .values(locked_at=func.now())
+        )
+        session.commit()
+
+
+def fail_stuck_documents(
+    max_attempts=settings.LEDGER_MAX_ATTEMPTS,
+    lock_timeout=settings.LEDGER_LOCK_TIMEOUT,
+):
+    """
+    Mark documents failed whose lock expired (their worker died) after they
+    used all `max_attempts` claims, so a document that keeps crashing its
+    worker is not retried forever. Returns how many were marked.
+    """
+    stmt = (
+        update(Document)
+        .where(
+            Document.locked_at < func.now() - timedelta(seconds=lock_timeout),
+            Document.attempts >= max_attempts,
+        )
+        .values(
+            state=FAILED,
+            locked_at=None,
+            error=f"Lock expired after {max_attempts} attempts",
+        )
+    )
+    with get_db_session() as session:
+        failed = session.execute(stmt).rowcount
+        session.commit()
+    return failed
+
+
+def dispatchable_documents(
+    max_attempts=settings.LEDGER_MAX_ATTEMPTS,
+    lock_timeout=settings.LEDGER_LOCK_TIMEOUT,
+    limit=settings.SCAN_DISPATCH_LIMIT,
+):
+    """
+    Unlocked documents that need work: newly discovered, OCR'd but not yet
+    embedded, or failed or stuck under a lock older than `lock_timeout` with
+    attempts left (see fail_stuck_documents for those without). Oldest first.
+    Dispatching one twice is harmless, since each task must claim the
+    document before working on it.
+    """
+    with get_db_session() as session:
+        return (
+            session.query(Document)
+            .filter(
+                _lock_free(lock_timeout),
+                or_(
+                    Document.state.in_([DISCOVERED, OCR_DONE]),
+                    and_(Document.state == FAILED, Document.attempts < max_attempts),
+                    and_(
+                        Document.locked_at.is_not(None),
+                        Document.attempts < max_attempts,
+                    ),
+                ),
+            )
+            .order_by(Document.blob_updated)
+            .limit(limit)
+            .all()
+        )
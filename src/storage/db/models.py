@@ -1,6 +1,16 @@
+import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -22,3 +32,31 @@ class User(Base):
     id = Column(Integer, primary_key=True)
     username = Column(String(64), unique=True, nullable=False, index=True)
     password_hash = Column(String(128), nullable=False)
+
+
+class Document(Base):
+    """
+    Ingestion ledger: one row per source PDF (blob name at discovery), tracking
+    the blob generation being processed and its state.
+    """
+
+    __tablename__ = "documents"
+
+    blob_name = Column(String(1024), primary_key=True)
+    generation = Column(BigInteger, nullable=False)
+    blob_updated = Column(DateTime(timezone=True), nullable=False, index=True)
+    # "discovered", "ocr_running", "ocr_done", "embedded" or "failed"
+    state = Column(String(16), nullable=False, index=True)
+    source_uri = Column(String(1024), nullable=False)  # current location
+    output_prefix = Column(String(1024))  # OCR output, once written
+    # Batch OCR: operation name, and one {"input", "first_page", "output"}
+    # entry per page range sent to Document AI
+    ocr_operation = Column(String(256), index=True)
+    ocr_parts = Column(JSON)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    locked_at = Column(DateTime(timezone=True))  # set while a task owns the row
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
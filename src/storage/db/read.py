@@ -12,3 +12,23 @@ def get_chunk_sources(chunk_ids: list):
             session.query(Chunk.id, Chunk.source).filter(Chunk.id.in_(chunk_ids)).all()
         )
         return {row.id: row.source for row in result}
+
+
+def get_chunk_ids_for_source(source: str):
+    """
+    Return the set of chunk IDs stored in Postgres for a source document.
+    """
+    with get_db_session() as session:
+        result = session.query(Chunk.id).filter(Chunk.source == source).all()
+        return {row.id for row in result}
+
+
+def get_existing_chunk_ids(chunk_ids: list):
+    """
+    Return the subset of chunk_ids that already have a row in Postgres.
+    """
+    if not chunk_ids:
+        return set()
+    with get_db_session() as session:
+        result = session.query(Chunk.id).filter(Chunk.id.in_(chunk_ids)).all()
+        return {row.id for row in result}
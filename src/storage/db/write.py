@@ -1,21 +1,68 @@
-from storage.db.models import Chunk
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from storage.db.auth import hash_password
+from storage.db.models import Chunk, User
 from storage.db.session import get_db_session
 
+# Rows per multi-row INSERT; keeps each statement well under the
+# 65535 bind-parameter limit (5 columns per row).
+INSERT_PAGE_SIZE = 5000
+
 
-def insert_chunks_in_postgres(source_pdf: str, chunks: list):
+def insert_chunks_in_postgres(
+    source_pdf: str, chunks: list, page_size: int = INSERT_PAGE_SIZE
+):
     """
     Write chunk metadata to Postgres for traceability.
+
+    Rows are written with multi-row INSERT ... ON CONFLICT (id) DO UPDATE,
+    `page_size` rows per round trip, so re-running the same batch (e.g. a
+    retried task) overwrites the rows instead of failing on the primary key.
     """
+    # Identical chunks share a content-derived ID, and ON CONFLICT DO UPDATE
+    # rejects a statement that touches the same row twice.
+    rows = list(
+        {
+            chunk["id"]: {
+                "id": chunk["id"],
+                "source": source_pdf,
+                "type": chunk["type"],
+                "text": chunk["text"],
+                "page": chunk.get("page"),
+            }
+            for chunk in chunks
+        }.values()
+    )
+    if not rows:
+        return
+
     with get_db_session() as session:
-        for chunk in chunks:
-            chunk_record = Chunk(
-                id=chunk["id"],
-                source=source_pdf,
-                type=chunk["type"],
-                text=chunk["text"],
-                page=chunk.get("page"),
+        for start in range(0, len(rows), page_size):
+            stmt = insert(Chunk).values(rows[start : start + page_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Chunk.id],
+                set_={
+                    "source": stmt.excluded.source,
+                    "type": stmt.excluded.type,
+                    "text": stmt.excluded.text,
+                    "page": stmt.excluded.page,
+                },
             )
-            session.add(chunk_record)
+            session.execute(stmt)
+        session.commit()
+
+
+def delete_chunks_from_postgres(chunk_ids):
+    """
+    Delete chunk rows by ID.
+    """
+    if not chunk_ids:
+        return
+    with get_db_session() as session:
+        session.query(Chunk).filter(Chunk.id.in_(list(chunk_ids))).delete(
+            synchronize_session=False
+        )
         session.commit()
 
 
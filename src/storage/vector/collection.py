@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    HnswConfigDiff,
+    Modifier,
+    PayloadSchemaType,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SparseVectorParams,
+    VectorParams,
+)
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+qdrant_client = QdrantClient(host="qdrant", port=6333)
+# For async request handlers; connects lazily on the running event loop
+async_qdrant_client = AsyncQdrantClient(host="qdrant", port=6333)
+
+# Vector names in hybrid collections; plain collections have one unnamed vector
+DENSE_VECTOR = "dense"
+SPARSE_VECTOR = "sparse"
+
+# Payload fields search_chunks filters on
+PAYLOAD_INDEXES = {
+    "source": PayloadSchemaType.KEYWORD,
+    "type": PayloadSchemaType.KEYWORD,
+    "page": PayloadSchemaType.INTEGER,
+}
+
+
+def quantization_config(kind, always_ram=True):
+    """
+    Qdrant quantization for `kind`: "scalar" (int8, 4x smaller), "binary"
+    (1 bit per dimension, 32x smaller) or "" for none.
+    """
+    if not kind:
+        return None
+    if kind == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=always_ram
+            )
+        )
+    if kind == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    raise ValueError(f"Unknown quantization: {kind}")
+
+
+def ensure_qdrant_collection(
+    client,
+    collection_name,
+    vector_size,
+    distance,
+    quantization=settings.QDRANT_QUANTIZATION,
+    vectors_on_disk=settings.QDRANT_VECTORS_ON_DISK,
+    hnsw_on_disk=settings.QDRANT_HNSW_ON_DISK,
+    hybrid=settings.QDRANT_HYBRID,
+):
+    """
+    Create the collection if missing. Storage options only apply on creation;
+    an existing collection keeps its own until it is recreated.
+
+    With `hybrid`, the dense vector is named DENSE_VECTOR and a SPARSE_VECTOR
+    with IDF weighting (for BM25-style term vectors) is added.
+    """
+    # Accept Distance enum or string; coerce if needed
+    if isinstance(distance, str):
+        distance = Distance[distance.upper()]
+    if not client.collection_exists(collection_name):
+        vector_params = VectorParams(
+            size=vector_size, distance=distance, on_disk=vectors_on_disk
+        )
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=({DENSE_VECTOR: vector_params} if hybrid else vector_params),
+            sparse_vectors_config=(
+                {SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)}
+                if hybrid
+                else None
+            ),
+            hnsw_config=HnswConfigDiff(on_disk=hnsw_on_disk),
+            quantization_config=quantization_config(
+                quantization, settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+            ),
+        )
+        logger.info(
+            f"Created Qdrant collection '{collection_name}' "
+            f"(hybrid={hybrid}, quantization={quantization or 'none'}, "
+            f"vectors_on_disk={vectors_on_disk}, hnsw_on_disk={hnsw_on_disk})"
+        )
+
+
+def ensure_payload_indexes(client, collection_name, indexes=PAYLOAD_INDEXES):
+    """
+    Create the payload indexes missing from the collection.
+    """
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in indexes.items():
+        if field not in existing:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field,
+                field_schema=schema,
+            )
+            logger.info(f"Created {schema.value} index on '{collection_name}.{field}'")
+
+
+_ready = set()
+_ready_lock = threading.Lock()
+
+
+def ensure_collection(
+    collection_name, vector_size, hybrid=settings.QDRANT_HYBRID, client=qdrant_client
+):
+    """
+    Make sure `collection_name` exists with the expected vectors (size, and
+    named dense + sparse when `hybrid`) and payload indexes. Qdrant is only
+    consulted the first time per process; later calls are a set lookup.
+    """
+    key = (os.getpid(), collection_name, hybrid)
+    if key in _ready:
+        return
+    with _ready_lock:
+        if key in _ready:
+            return
+        try:
+            ensure_qdrant_collection(
+                client, collection_name, vector_size, Distance.COSINE, hybrid=hybrid
+            )
+        except Exception:
+            # Another worker may have created it first
+            if not client.collection_exists(collection_name):
+                raise
+        params = client.get_collection(collection_name).config.params
+        vectors = params.vectors
+        if hybrid:
+            if (
+                not isinstance(vectors, dict)
+                or DENSE_VECTOR not in vectors
+                or SPARSE_VECTOR not in (params.sparse_vectors or {})
+            ):
+                raise ValueError(
+                    f"Collection '{collection_name}' is not a hybrid collection; "
+                    "recreate it or point QDRANT_COLLECTION at a new one"
+                )
+            vectors = vectors[DENSE_VECTOR]
+        elif isinstance(vectors, dict):
+            raise ValueError(
+                f"Collection '{collection_name}' has named vectors; "
+                "set QDRANT_HYBRID=true to use it"
+            )
+        if vectors.size != vector_size:
+            raise ValueError(
+                f"Collection '{collection_name}' has {vectors.size}-dim vectors, "
+                f"got {vector_size}"
+            )
+        ensure_payload_indexes(client, collection_name)
+        _ready.add(key)
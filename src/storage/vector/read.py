@@ -1,27 +1,257 @@
-from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    Fusion,
+    FusionQuery,
+    MatchAny,
+    MatchValue,
+    Prefetch,
+    QuantizationSearchParams,
+    QueryRequest,
+    Range,
+    SearchParams,
+    SparseVector,
+)
 
-qdrant_client = QdrantClient(host="qdrant", port=6333)
+from storage.vector.collection import (
+    DENSE_VECTOR,
+    SPARSE_VECTOR,
+    async_qdrant_client,
+    qdrant_client,
+)
+from utils.config import settings
 
 
-def search_chunks(query_embedding, collection="chunks", limit=5):
+def search_params(
+    rescore=settings.QDRANT_SEARCH_RESCORE,
+    oversampling=settings.QDRANT_SEARCH_OVERSAMPLING,
+    hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF,
+    exact=False,
+):
     """
-    Searches Qdrant for the top-N most relevant chunks given a query embedding.
-    Returns a list of dicts with text and metadata.
+    Search parameters for a (possibly) quantized collection: fetch
+    limit x oversampling candidates by quantized score, then rescore them with
+    the original vectors. Ignored by Qdrant when the collection has no
+    quantization.
+    """
+    return SearchParams(
+        hnsw_ef=hnsw_ef,
+        exact=exact,
+        quantization=QuantizationSearchParams(
+            rescore=rescore, oversampling=oversampling
+        ),
+    )
+
+
+def chunk_filter(source=None, chunk_type=None, page_range=None):
+    """
+    Qdrant filter on the indexed payload fields. `source` and `chunk_type` take
+    one value or a list of values; `page_range` is an inclusive (first, last)
+    pair, either end may be None.
+    """
+    conditions = []
+    for field, value in (("source", source), ("type", chunk_type)):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            match = MatchAny(any=list(value))
+        else:
+            match = MatchValue(value=value)
+        conditions.append(FieldCondition(key=field, match=match))
+    if page_range is not None:
+        first, last = page_range
+        conditions.append(FieldCondition(key="page", range=Range(gte=first, lte=last)))
+    return Filter(must=conditions) if conditions else None
+
+
+def weighted_rrf(rankings, weights, k=settings.HYBRID_RRF_K, limit=5):
+    """
+    Weighted reciprocal-rank fusion: each point scores sum(w / (k + rank)) over
+    the rankings it appears in. Returns the top `limit` points with the fused
+    score.
     """
-    results = qdrant_client.search(
+    scores = {}
+    points = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, point in enumerate(ranking, start=1):
+            scores[point.id] = scores.get(point.id, 0.0) + weight / (k + rank)
+            points.setdefault(point.id, point)
+    top = sorted(scores, key=scores.__getitem__, reverse=True)[:limit]
+    return [points[i].model_copy(update={"score": scores[i]}) for i in top]
+
+
+def search_request(
+    query_embedding,
+    collection=settings.QDRANT_COLLECTION,
+    limit=5,
+    params=None,
+    source=None,
+    chunk_type=None,
+    page_range=None,
+    sparse_embedding=None,
+    hybrid=settings.QDRANT_HYBRID,
+    weights=(settings.HYBRID_DENSE_WEIGHT, settings.HYBRID_SPARSE_WEIGHT),
+):
+    """
+    The Qdrant client method and arguments for a search_chunks call, shared by
+    the sync and async clients.
+    """
+    query_filter = chunk_filter(source, chunk_type, page_range)
+    params = params or search_params()
+    if sparse_embedding is None:
+        return "query_points", dict(
+            collection_name=collection,
+            query=query_embedding,
+            using=DENSE_VECTOR if hybrid else None,
+            query_filter=query_filter,
+            limit=limit,
+            search_params=params,
+            with_payload=True,
+            with_vectors=False,
+        )
+
+    prefetch_limit = max(limit, settings.HYBRID_PREFETCH_LIMIT)
+    sides = [
+        (query_embedding, DENSE_VECTOR, params),
+        (SparseVector(**sparse_embedding), SPARSE_VECTOR, None),
+    ]
+    if weights[0] == weights[1]:
+        return "query_points", dict(
+            collection_name=collection,
+            prefetch=[
+                Prefetch(
+                    query=query,
+                    using=using,
+                    filter=query_filter,
+                    params=side_params,
+                    limit=prefetch_limit,
+                )
+                for query, using, side_params in sides
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=limit,
+            with_payload=True,
+            with_vectors=False,
+        )
+    return "query_batch_points", dict(
         collection_name=collection,
-        query_vector=query_embedding,
-        limit=limit,
-        with_payload=True,
-        with_vectors=False,
+        requests=[
+            QueryRequest(
+                query=query,
+                using=using,
+                filter=query_filter,
+                params=side_params,
+                limit=prefetch_limit,
+                with_payload=True,
+            )
+            for query, using, side_params in sides
+        ],
     )
+
+
+def search_results(response, limit=5, weights=None):
+    """
+    Chunk dicts from a query_points response, or from query_batch_points
+    responses fused with weighted_rrf.
+    """
+    if isinstance(response, list):
+        points = weighted_rrf([part.points for part in response], weights, limit=limit)
+    else:
+        points = response.points
     return [
         {
             "id": hit.payload.get("id"),
+            "source": hit.payload.get("source") or "?",
             "text": hit.payload.get("text"),
             "type": hit.payload.get("type"),
             "page": hit.payload.get("page"),
             "score": hit.score,
         }
-        for hit in results
+        for hit in points
     ]
+
+
+def search_chunks(
+    query_embedding,
+    collection=settings.QDRANT_COLLECTION,
+    limit=5,
+    params=None,
+    source=None,
+    chunk_type=None,
+    page_range=None,
+    sparse_embedding=None,
+    hybrid=settings.QDRANT_HYBRID,
+    weights=(settings.HYBRID_DENSE_WEIGHT, settings.HYBRID_SPARSE_WEIGHT),
+):
+    """
+    Searches Qdrant for the top-N most relevant chunks given a query embedding,
+    optionally restricted to documents, chunk types or pages (see chunk_filter).
+    Returns a list of dicts with text and metadata.
+
+    In a `hybrid` collection, passing `sparse_embedding` ({"indices", "values"})
+    also runs the keyword side and fuses both rankings with RRF: in one Qdrant
+    prefetch/fusion query when the (dense, sparse) `weights` are equal, or by
+    weighted_rrf over one batched request otherwise, since Qdrant's RRF is
+    unweighted.
+    """
+    method, request = search_request(
+        query_embedding,
+        collection,
+        limit,
+        params,
+        source,
+        chunk_type,
+        page_range,
+        sparse_embedding,
+        hybrid,
+        weights,
+    )
+    response = getattr(qdrant_client, method)(**request)
+    return search_results(response, limit, weights)
+
+
+async def search_chunks_async(
+    query_embedding,
+    collection=settings.QDRANT_COLLECTION,
+    limit=5,
+    params=None,
+    source=None,
+    chunk_type=None,
+    page_range=None,
+    sparse_embedding=None,
+    hybrid=settings.QDRANT_HYBRID,
+    weights=(settings.HYBRID_DENSE_WEIGHT, settings.HYBRID_SPARSE_WEIGHT),
+):
+    """
+    search_chunks on the AsyncQdrantClient, for the request path.
+    """
+    method, request = search_request(
+        query_embedding,
+        collection,
+        limit,
+        params,
+        source,
+        chunk_type,
+        page_range,
+        sparse_embedding,
+        hybrid,
+        weights,
+    )
+    response = await getattr(async_qdrant_client, method)(**request)
+    return search_results(response, limit, weights)
+
+
+def get_existing_point_ids(collection, point_ids):
+    """
+    Return the subset of point_ids that are stored in `collection` (none if the
+    collection does not exist yet).
+    """
+    if not point_ids or not qdrant_client.collection_exists(collection):
+        return set()
+    points = qdrant_client.retrieve(
+        collection_name=collection,
+        ids=list(point_ids),
+        with_payload=False,
+        with_vectors=False,
+    )
+    return {str(point.id) for point in points}
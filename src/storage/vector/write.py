@@ -1,57 +1,67 @@
 import logging
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, VectorParams
-
-logger = logging.getLogger(__name__)
-
-
-qdrant_client = QdrantClient(host="qdrant", port=6333)
-
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
+import numpy as np
+from qdrant_client.models import Batch, PointIdsList, SparseVector
 
+from storage.vector.collection import (
+    DENSE_VECTOR,
+    SPARSE_VECTOR,
+    ensure_collection,
+    qdrant_client,
+)
 
-def ensure_qdrant_collection(client, collection_name, vector_size, distance):
-    # Accept Distance enum or string; coerce if needed
-    if isinstance(distance, str):
-        distance = Distance[distance.upper()]
-    existing_collections = [c.name for c in client.get_collections().collections]
-    if collection_name not in existing_collections:
-        client.recreate_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(size=vector_size, distance=distance),
-        )
+logger = logging.getLogger(__name__)
 
 
-def upsert_chunks_in_qdrant(collection, chunks, embeddings):
-    """
-    Write each chunk+embedding as a point to Qdrant.
+def upsert_chunks_in_qdrant(
+    collection, chunks, embeddings, source_pdf=None, sparse_embeddings=None
+):
     """
+    Write each chunk+embedding as a point to Qdrant. `source_pdf` is stored in
+    the payload so searches can filter by document.
 
-    # Ensure the collection exists before upsert
-    ensure_qdrant_collection(
-        client=qdrant_client,
-        collection_name=collection,
-        vector_size=len(embeddings[0]),
-        distance=Distance.COSINE,
-    )
-    print("collection_name -- len chunks", collection, len(chunks))
-
-    points = []
-    for idx, (chunk, vector) in enumerate(zip(chunks, embeddings)):
-        point = PointStruct(
-            id=chunk["id"],  # assign a unique id
-            vector=vector,
-            payload={
+    With `sparse_embeddings` ({"indices", "values"} per chunk) the points go to
+    a hybrid collection as named dense + sparse vectors.
+    """
+    # Columnar batch: one conversion of the float32 array to the client's lists
+    vectors = np.asarray(embeddings, dtype=np.float32).tolist()
+    hybrid = sparse_embeddings is not None
+    ensure_collection(collection, vector_size=len(vectors[0]), hybrid=hybrid)
+    if hybrid:
+        vectors = {
+            DENSE_VECTOR: vectors,
+            SPARSE_VECTOR: [SparseVector(**sparse) for sparse in sparse_embeddings],
+        }
+    batch = Batch(
+        ids=[chunk["id"] for chunk in chunks],
+        vectors=vectors,
+        payloads=[
+            {
                 "id": chunk["id"],
+                "source": source_pdf,
                 "type": chunk["type"],
                 "text": chunk["text"],
                 "page": chunk.get("page"),
-            },
-        )
-        points.append(point)
-
-    qdrant_client.upsert(collection_name=collection, points=points)
+                "tokens": chunk.get("tokens"),
+            }
+            for chunk in chunks
+        ],
+    )
+    qdrant_client.upsert(collection_name=collection, points=batch)
 
     logger.info(f"Upserted {len(chunks)} chunks to Qdrant collection '{collection}'")
+
+
+def delete_chunks_from_qdrant(collection, chunk_ids):
+    """
+    Delete the points with the given chunk IDs from Qdrant.
+    """
+    if not chunk_ids:
+        return
+    qdrant_client.delete(
+        collection_name=collection,
+        points_selector=PointIdsList(points=list(chunk_ids)),
+    )
+    logger.info(
+        f"Deleted {len(chunk_ids)} chunks from Qdrant collection '{collection}'"
+    )
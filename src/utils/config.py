@@ -14,7 +14,27 @@ class Settings:
     GCP_DOC_PROCESSOR_ID = os.environ["GCP_DOC_PROCESSOR_ID"]
     GOOGLE_APPLICATION_CREDENTIALS = os.environ["GOOGLE_APPLICATION_CREDENTIALS"]
     GCS_BUCKET_NAME = os.environ["GCS_BUCKET_NAME"]
+    SIGNED_URL_CACHE_SIZE = int(os.environ.get("SIGNED_URL_CACHE_SIZE", "4096"))
+    SIGNED_URL_BUCKET_SECONDS = int(os.environ.get("SIGNED_URL_BUCKET_SECONDS", "300"))
+    CITATION_LINKS = os.environ.get("CITATION_LINKS", "signed")
+    OBJECT_STORE = os.environ.get("OBJECT_STORE", "gcs")
+    OBJECT_STORE_ROOT = os.environ.get("OBJECT_STORE_ROOT", "data/bucket")
+    GCS_POOL_SIZE = int(os.environ.get("GCS_POOL_SIZE", "32"))
+    GCS_IO_CONCURRENCY = int(os.environ.get("GCS_IO_CONCURRENCY", "16"))
     CELERY_BROKER_URL = os.environ["CELERY_BROKER_URL"]
+    CELERY_RESULT_BACKEND = os.environ.get(
+        "CELERY_RESULT_BACKEND", "redis://redis:6379/1"
+    )
+    CELERY_RESULT_EXPIRES = int(os.environ.get("CELERY_RESULT_EXPIRES", "86400"))
+    CELERY_ALWAYS_EAGER = (
+        os.environ.get("CELERY_ALWAYS_EAGER", "false").lower() == "true"
+    )
+    CELERY_IO_QUEUE = os.environ.get("CELERY_IO_QUEUE", "io")
+    CELERY_CPU_QUEUE = os.environ.get("CELERY_CPU_QUEUE", "cpu")
+    CELERY_PREFETCH_MULTIPLIER = int(os.environ.get("CELERY_PREFETCH_MULTIPLIER", "1"))
+    CELERY_VISIBILITY_TIMEOUT = int(
+        os.environ.get("CELERY_VISIBILITY_TIMEOUT", "10800")
+    )
     POSTGRES_DB = os.environ.get("POSTGRES_DB")
     POSTGRES_USER = os.environ.get("POSTGRES_USER")
     POSTGRES_PASSWORD = os.environ.get("POSTGRES_PASSWORD")
@@ -24,8 +44,100 @@ class Settings:
     LAMBDA_API_KEY = os.environ.get("LAMBDA_API_KEY")
     LAMBDA_API_BASE = os.environ.get("LAMBDA_API_BASE")
     EMBEDDING_API_ENDPOINT = os.environ.get("EMBEDDING_API_ENDPOINT")
+    EMBEDDING_API_ENDPOINTS = os.environ.get("EMBEDDING_API_ENDPOINTS", "")
+    EMBED_CLIENT_RETRIES = int(os.environ.get("EMBED_CLIENT_RETRIES", "3"))
+    EMBED_CLIENT_TIMEOUT = float(os.environ.get("EMBED_CLIENT_TIMEOUT", "60"))
+    EMBED_CLIENT_CONCURRENCY = int(os.environ.get("EMBED_CLIENT_CONCURRENCY", "4"))
+    EMBED_CLIENT_POOL_SIZE = int(os.environ.get("EMBED_CLIENT_POOL_SIZE", "16"))
     EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL")
     EMBED_BATCH_LIMIT = os.environ.get("EMBED_BATCH_LIMIT")
+    EMBED_WIRE_FORMAT = os.environ.get("EMBED_WIRE_FORMAT", "float32")
+    EMBED_MAX_BATCH_TOKENS = int(os.environ.get("EMBED_MAX_BATCH_TOKENS", "8192"))
+    EMBED_SESSIONS = int(os.environ.get("EMBED_SESSIONS", "1"))
+    EMBED_SESSION_THREADS = int(os.environ.get("EMBED_SESSION_THREADS", "0"))
+    EMBED_MICRO_BATCHING = (
+        os.environ.get("EMBED_MICRO_BATCHING", "true").lower() == "true"
+    )
+    EMBED_MAX_BATCH = int(os.environ.get("EMBED_MAX_BATCH", "0"))
+    EMBED_MAX_WAIT_MS = float(os.environ.get("EMBED_MAX_WAIT_MS", "5"))
+    EMBED_LATENCY_BUDGET_MS = float(os.environ.get("EMBED_LATENCY_BUDGET_MS", "250"))
+    EMBED_CACHE_MAX_MB = int(os.environ.get("EMBED_CACHE_MAX_MB", "256"))
+    EMBED_CACHE_BACKEND = os.environ.get("EMBED_CACHE_BACKEND", "")
+    EMBED_CACHE_PATH = os.environ.get(
+        "EMBED_CACHE_PATH", "/app/nlp/embedding_cache.sqlite3"
+    )
+    EMBED_CACHE_REDIS_URL = os.environ.get("EMBED_CACHE_REDIS_URL")
+    EMBED_CACHE_TTL = int(os.environ.get("EMBED_CACHE_TTL", "0")) or None
+    OCR_PREFETCH_SHARDS = int(os.environ.get("OCR_PREFETCH_SHARDS", "4"))
+    OCR_STREAMING_PARSE = (
+        os.environ.get("OCR_STREAMING_PARSE", "true").lower() == "true"
+    )
+    OCR_BATCH_DOCUMENTS = int(os.environ.get("OCR_BATCH_DOCUMENTS", "20"))
+    OCR_SPLIT_PAGES = int(os.environ.get("OCR_SPLIT_PAGES", "200"))
+    OCR_POLL_SECONDS = float(os.environ.get("OCR_POLL_SECONDS", "30"))
+    OCR_OUTPUT_PREFIX = os.environ.get("OCR_OUTPUT_PREFIX", "output/batches/")
+    DOCUMENTAI_FAKE = os.environ.get("DOCUMENTAI_FAKE", "false").lower() == "true"
+    DOCUMENTAI_FAKE_LATENCY = float(os.environ.get("DOCUMENTAI_FAKE_LATENCY", "5"))
+    CHUNK_TOKENIZER = os.environ.get("CHUNK_TOKENIZER", "")
+    CHUNK_MIN_TOKENS = int(os.environ.get("CHUNK_MIN_TOKENS", "64"))
+    CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", "480"))
+    CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "32"))
+    INGEST_PIPELINED = os.environ.get("INGEST_PIPELINED", "true").lower() == "true"
+    INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", "2"))
+    LEDGER_LOCK_TIMEOUT = int(os.environ.get("LEDGER_LOCK_TIMEOUT", "7200"))
+    LEDGER_MAX_ATTEMPTS = int(os.environ.get("LEDGER_MAX_ATTEMPTS", "3"))
+    SCAN_WATERMARK_OVERLAP = int(os.environ.get("SCAN_WATERMARK_OVERLAP", "600"))
+    SCAN_DISPATCH_LIMIT = int(os.environ.get("SCAN_DISPATCH_LIMIT", "100"))
+    INGEST_SKIP_UNCHANGED = (
+        os.environ.get("INGEST_SKIP_UNCHANGED", "true").lower() == "true"
+    )
+    QDRANT_COLLECTION = os.environ.get("QDRANT_COLLECTION", "chunks")
+    QDRANT_HYBRID = os.environ.get("QDRANT_HYBRID", "false").lower() == "true"
+    SPARSE_MODEL = os.environ.get("SPARSE_MODEL", "")
+    HYBRID_PREFETCH_LIMIT = int(os.environ.get("HYBRID_PREFETCH_LIMIT", "50"))
+    HYBRID_DENSE_WEIGHT = float(os.environ.get("HYBRID_DENSE_WEIGHT", "1.0"))
+    HYBRID_SPARSE_WEIGHT = float(os.environ.get("HYBRID_SPARSE_WEIGHT", "1.0"))
+    HYBRID_RRF_K = int(os.environ.get("HYBRID_RRF_K", "60"))
+    INFER_RATE_LIMIT = os.environ.get("INFER_RATE_LIMIT", "5/minute")
+    SSE_COALESCE_MS = float(os.environ.get("SSE_COALESCE_MS", "50"))
+    SSE_COALESCE_CHARS = int(os.environ.get("SSE_COALESCE_CHARS", "256"))
+    RERANK_ENABLED = os.environ.get("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL = os.environ.get("RERANK_MODEL", "")
+    RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", "50"))
+    RERANK_MAX_DOCUMENTS = int(os.environ.get("RERANK_MAX_DOCUMENTS", "100"))
+    RERANK_TOP_N = int(os.environ.get("RERANK_TOP_N", "5"))
+    RERANK_MAX_LATENCY_MS = float(os.environ.get("RERANK_MAX_LATENCY_MS", "150"))
+    RERANK_BATCH_SIZE = int(os.environ.get("RERANK_BATCH_SIZE", "16"))
+    RERANK_CACHE_ENTRIES = int(os.environ.get("RERANK_CACHE_ENTRIES", "50000"))
+    RERANK_MAX_CONCURRENT = int(os.environ.get("RERANK_MAX_CONCURRENT", "2"))
+    ANSWER_CACHE_ENABLED = (
+        os.environ.get("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+    )
+    ANSWER_CACHE_COLLECTION = os.environ.get("ANSWER_CACHE_COLLECTION", "answer_cache")
+    ANSWER_CACHE_REDIS_URL = os.environ.get(
+        "ANSWER_CACHE_REDIS_URL", "redis://redis:6379/2"
+    )
+    ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_TTL = int(os.environ.get("ANSWER_CACHE_TTL", "86400"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+    ANSWER_CACHE_PRUNE_EVERY = int(os.environ.get("ANSWER_CACHE_PRUNE_EVERY", "100"))
+    QDRANT_QUANTIZATION = os.environ.get("QDRANT_QUANTIZATION", "").lower()
+    QDRANT_QUANTIZATION_ALWAYS_RAM = (
+        os.environ.get("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+    )
+    QDRANT_VECTORS_ON_DISK = (
+        os.environ.get("QDRANT_VECTORS_ON_DISK", "false").lower() == "true"
+    )
+    QDRANT_HNSW_ON_DISK = (
+        os.environ.get("QDRANT_HNSW_ON_DISK", "false").lower() == "true"
+    )
+    QDRANT_SEARCH_RESCORE = (
+        os.environ.get("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+    )
+    QDRANT_SEARCH_OVERSAMPLING = float(
+        os.environ.get("QDRANT_SEARCH_OVERSAMPLING", "2.0")
+    )
+    QDRANT_SEARCH_HNSW_EF = int(os.environ.get("QDRANT_SEARCH_HNSW_EF", "0")) or None
 
 
 settings = Settings()
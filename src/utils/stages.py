@@ -0,0 +1,91 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+def run_stages(items, stages, queue_size=2):
+    """
+    Push every item from `items` through `stages`, one thread per stage.
+
+    Stages are connected by bounded queues of `queue_size`, so a slow stage
+    applies backpressure upstream and at most a few items are in flight.
+    Each stage receives the previous stage's return value. The first error
+    in any stage (or in `items` itself) stops the whole pipeline and is
+    re-raised here.
+
+    Returns the number of items that went through every stage.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    failed = threading.Event()
+    errors = []
+    completed = [0]
+
+    def _put(q, item):
+        while not failed.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(q):
+        while not failed.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _worker(stage, inbox, outbox):
+        try:
+            while True:
+                item = _get(inbox)
+                if item is _DONE:
+                    break
+                result = stage(item)
+                if outbox is None:
+                    completed[0] += 1
+                elif not _put(outbox, result):
+                    break
+        except BaseException as err:
+            name = getattr(stage, "__name__", stage)
+            logger.exception(f"Pipeline stage {name} failed: {err}")
+            errors.append(err)
+            failed.set()
+        finally:
+            if outbox is not None:
+                _put(outbox, _DONE)
+
+    threads = []
+    for i, stage in enumerate(stages):
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        thread = threading.Thread(
+            target=_worker,
+            args=(stage, queues[i], outbox),
+            name=f"stage-{getattr(stage, '__name__', i)}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+
+    try:
+        for item in items:
+            if not _put(queues[0], item):
+                break
+        _put(queues[0], _DONE)
+    except BaseException as err:
+        errors.append(err)
+        failed.set()
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    return completed[0]
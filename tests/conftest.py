@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import time: run offline, against a local object store
+# and the fake Document AI client, before any project module is imported.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+for name in (
+    "SECRET_KEY",
+    "GCP_PROJECT_ID",
+    "GCP_DOC_LOCATION",
+    "GCP_DOC_PROCESSOR_ID",
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    "GCS_BUCKET_NAME",
+):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.update(
+    OBJECT_STORE="local",
+    OBJECT_STORE_ROOT=tempfile.mkdtemp(prefix="object_store_"),
+    DOCUMENTAI_FAKE="true",
+    DOCUMENTAI_FAKE_LATENCY="0",
+    OCR_SPLIT_PAGES="2",
+)
@@ -0,0 +1,186 @@
+import io
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from pypdf import PdfWriter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import celery_tasks.pipeline as pipeline
+from cloud_io.object_store import get_object_store
+from services.ocr_service import PARTS_PREFIX, collect_ocr_parts, prepare_ocr_parts
+from storage.db import ledger
+from storage.db.models import Document
+
+
+def make_pdf(pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    data = io.BytesIO()
+    writer.write(data)
+    return data.getvalue()
+
+
+@pytest.fixture
+def store():
+    """The local object store, emptied after each test."""
+    store = get_object_store()
+    yield store
+    shutil.rmtree(store.root, ignore_errors=True)
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """An in-memory SQLite ledger in place of Postgres."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Document.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+
+    @contextmanager
+    def get_db_session():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(ledger, "get_db_session", get_db_session)
+    return factory
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Chunk/embed tasks sent by the poller, instead of queueing them."""
+    calls = []
+    monkeypatch.setattr(
+        pipeline.chunk_embed_pipeline_task,
+        "delay",
+        lambda *args, **kwargs: calls.append(kwargs),
+    )
+    return calls
+
+
+def add_document(session_factory, store, blob_name, pages=None, data=None):
+    store.write(blob_name, data if data is not None else make_pdf(pages))
+    with session_factory() as session:
+        session.add(
+            Document(
+                blob_name=blob_name,
+                generation=1,
+                blob_updated=datetime.now(),
+                source_uri=store.uri(blob_name),
+                state=ledger.DISCOVERED,
+                attempts=0,
+            )
+        )
+        session.commit()
+    return [blob_name, 1, store.uri(blob_name)]
+
+
+def get_document(session_factory, blob_name):
+    with session_factory() as session:
+        return session.get(Document, blob_name)
+
+
+def test_prepare_and_collect_split_parts(store):
+    source_uri = store.uri("split.pdf")
+    store.write("split.pdf", make_pdf(5))
+
+    parts = prepare_ocr_parts(source_uri, "split.pdf", 1, pages_per_part=2)
+
+    assert [part["first_page"] for part in parts] == [1, 3, 5]
+    assert sorted(store.list(f"{PARTS_PREFIX}split.pdf/1/")) == [
+        f"{PARTS_PREFIX}split.pdf/1/pages-00001-00002.pdf",
+        f"{PARTS_PREFIX}split.pdf/1/pages-00003-00004.pdf",
+        f"{PARTS_PREFIX}split.pdf/1/pages-00005-00005.pdf",
+    ]
+
+    result = {
+        "done": True,
+        "error": None,
+        "documents": {
+            parts[0]["input"]: {"ok": True, "error": None, "output": "out/0/"},
+            parts[1]["input"]: {"ok": True, "error": None, "output": "out/1/"},
+            parts[2]["input"]: {"ok": False, "error": "bad page", "output": None},
+        },
+    }
+    collected, error = collect_ocr_parts(parts, result)
+    assert [part["output"] for part in collected] == ["out/0/", "out/1/", None]
+    assert error == f"{parts[2]['input']}: bad page"
+
+
+def test_short_pdf_is_sent_whole(store):
+    source_uri = store.uri("short.pdf")
+    store.write("short.pdf", make_pdf(2))
+
+    assert prepare_ocr_parts(source_uri, "short.pdf", 1, pages_per_part=2) == [
+        {"input": source_uri, "first_page": 1}
+    ]
+
+
+def test_submit_and_poll(session_factory, store, dispatched):
+    documents = [
+        add_document(session_factory, store, "long.pdf", pages=5),
+        add_document(session_factory, store, "one.pdf", pages=1),
+        add_document(session_factory, store, "corrupt.pdf", data=b"not a pdf"),
+    ]
+
+    operation = pipeline.submit_ocr_batch_task(documents)
+
+    # The corrupt PDF cannot be split; the others go out as one operation
+    assert get_document(session_factory, "corrupt.pdf").state == ledger.FAILED
+    long_doc = get_document(session_factory, "long.pdf")
+    assert long_doc.state == ledger.OCR_RUNNING
+    assert long_doc.ocr_operation == operation
+    assert [part["first_page"] for part in long_doc.ocr_parts] == [1, 3, 5]
+    assert get_document(session_factory, "one.pdf").ocr_operation == operation
+    # Already claimed and running: a repeated submit takes nothing
+    assert pipeline.submit_ocr_batch_task(documents[:2]) is None
+
+    pipeline.poll_ocr_operations()
+
+    for blob_name in ("long.pdf", "one.pdf"):
+        doc = get_document(session_factory, blob_name)
+        assert doc.state == ledger.OCR_DONE
+        assert doc.locked_at is None
+        assert doc.source_uri == store.uri(f"ocr_done/{blob_name}")
+    assert store.list(PARTS_PREFIX) == []
+    assert [obj["name"] for obj in store.list_info("", recursive=False)] == [
+        "corrupt.pdf"
+    ]
+
+    by_blob = {call["blob_name"]: call for call in dispatched}
+    assert sorted(by_blob) == ["long.pdf", "one.pdf"]
+    assert [first_page for _, first_page in by_blob["long.pdf"]["parts"]] == [
+        1,
+        3,
+        5,
+    ]
+    assert len(by_blob["one.pdf"]["parts"]) == 1
+
+
+def test_overlapping_polls_handle_a_document_once(
+    session_factory, store, dispatched, monkeypatch
+):
+    documents = [add_document(session_factory, store, "race.pdf", pages=1)]
+    pipeline.submit_ocr_batch_task(documents)
+
+    # Both polls start from the same in-flight snapshot, as when a slow poll
+    # runs into the next beat
+    in_flight = ledger.ocr_in_flight()
+    monkeypatch.setattr(pipeline, "ocr_in_flight", lambda: in_flight)
+    pipeline.poll_ocr_operations()
+    pipeline.poll_ocr_operations()
+
+    doc = get_document(session_factory, "race.pdf")
+    assert doc.state == ledger.OCR_DONE
+    assert doc.error is None
+    assert len(dispatched) == 1